@@ -0,0 +1,367 @@
+"""
+Headless entry point for batch-processing reports without Streamlit
+
+Examples:
+    python app/cli.py case-report "exports/*.xlsx" --output-dir formatted
+    python app/cli.py fcr exports/2024-* --start 2024-01-01 --end 2024-12-31 --summary fcr.csv
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from scripts import calculate_first_call_resolution
+from scripts.build_case_report import WRITE_ONLY
+from scripts.build_case_report import main as build_case_report
+from scripts.cache import parse_cache
+from scripts.case_store import CaseStore
+from scripts.calculate_first_call_resolution import get_first_call_resolution
+
+REPORT_EXTENSIONS = {".xlsx", ".xls", ".csv", ".html", ".htm"}
+
+# substrings that identify each FCR report within an export directory
+FCR_FILE_PATTERNS = {
+    "reopened": "reopen",
+    "closed": "closed",
+    "parent": "parent",
+}
+
+SUMMARY_FIELDS = [
+    "report_set",
+    "date",
+    "closed_case_count",
+    "escalated_case_count",
+    "child_case_count",
+    "total_cases",
+    "first_call_resolution",
+    "error",
+]
+
+
+def _init_worker() -> None:
+    # each worker handles whole reports, so don't fan out further or cache across jobs
+    calculate_first_call_resolution.PARALLEL_MIN_MB = float("inf")
+    parse_cache.max_bytes = 0
+
+
+def expand_paths(patterns: Iterable[str], directories: bool = False) -> list[Path]:
+    """Expands globs; directories are expanded to the reports inside them unless `directories`"""
+
+    paths: list[Path] = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        if not matches:
+            print(f"{pattern}: no such file or directory", file=sys.stderr)
+
+        for match in matches:
+            path = Path(match)
+            if directories:
+                if path.is_dir():
+                    paths.append(path)
+
+            elif path.is_dir():
+                paths.extend(
+                    p for p in sorted(path.iterdir()) if p.suffix.lower() in REPORT_EXTENSIONS
+                )
+
+            elif path.suffix.lower() in REPORT_EXTENSIONS:
+                paths.append(path)
+
+    return paths
+
+
+def find_fcr_reports(report_set: Path) -> dict[str, Path]:
+    reports: dict[str, Path] = {}
+    for path in sorted(report_set.iterdir()):
+        if path.suffix.lower() not in REPORT_EXTENSIONS:
+            continue
+
+        for name, pattern in FCR_FILE_PATTERNS.items():
+            if pattern in path.name.lower().replace("-", "").replace("_", ""):
+                reports.setdefault(name, path)
+
+    missing = [name for name in FCR_FILE_PATTERNS if name not in reports]
+    if missing:
+        raise ValueError(f"Missing {', '.join(missing)} report(s) in {report_set}")
+
+    return reports
+
+
+def run_case_report(
+    report_path: Path,
+    output_dir: Path,
+    report_datetime: Optional[datetime],
+    thresholds: dict,
+    write_only: bool = False,
+) -> dict[str, Any]:
+    if report_datetime is None:
+        report_datetime = datetime.fromtimestamp(report_path.stat().st_mtime)
+
+    output_path = output_dir / f"{report_path.stem} formatted.xlsx"
+    try:
+        with open(report_path, "rb") as f, open(output_path, "wb") as output:
+            case_report = build_case_report(
+                f, report_datetime, **thresholds, output=output, write_only=write_only
+            )
+
+        return {
+            "report": str(report_path),
+            "output": str(output_path),
+            "unmapped_statuses": case_report.unmapped_statuses,
+            "warnings": case_report.warnings,
+            "error": None,
+        }
+
+    # keep going with the rest of the batch whatever goes wrong with this report
+    except Exception as e:  # pylint: disable=broad-except
+        output_path.unlink(missing_ok=True)
+        return {"report": str(report_path), "output": None, "error": str(e)}
+
+
+def ingest_fcr(report_set: Path, case_store_path: Path) -> Optional[str]:
+    """Adds the set's re-opened and closed reports to the case store, returning any error"""
+
+    try:
+        reports = find_fcr_reports(report_set)
+        with open(reports["reopened"], "rb") as reopened_file, open(
+            reports["closed"], "rb"
+        ) as closed_file:
+            calculate_first_call_resolution.ingest_fcr_reports(
+                CaseStore(str(case_store_path)), reopened_file, closed_file
+            )
+
+    # keep going with the rest of the batch whatever goes wrong with this report set
+    except Exception as e:  # pylint: disable=broad-except
+        return str(e)
+
+    return None
+
+
+def run_fcr(
+    report_set: Path,
+    start_date: date,
+    end_date: Optional[date],
+    child_case_threshold: int,
+    case_store_path: Optional[Path] = None,
+) -> list[dict[str, Any]]:
+    try:
+        case_store = CaseStore(str(case_store_path)) if case_store_path else None
+        reports = find_fcr_reports(report_set)
+        with open(reports["reopened"], "rb") as reopened_file, open(
+            reports["closed"], "rb"
+        ) as closed_file, open(reports["parent"], "rb") as parent_file:
+            if end_date is None:
+                days = {
+                    start_date: calculate_first_call_resolution.main(
+                        start_date,
+                        reopened_file,
+                        closed_file,
+                        parent_file,
+                        child_case_threshold,
+                        case_store=case_store,
+                    )
+                }
+
+            else:
+                calculations = calculate_first_call_resolution.main_range(
+                    start_date,
+                    end_date,
+                    reopened_file,
+                    closed_file,
+                    parent_file,
+                    child_case_threshold,
+                    case_store=case_store,
+                )
+                days = {**calculations["days"], "total": calculations["total"]}
+
+    # keep going with the rest of the batch whatever goes wrong with this report set
+    except Exception as e:  # pylint: disable=broad-except
+        return [{"report_set": str(report_set), "error": str(e)}]
+
+    return [
+        {
+            "report_set": str(report_set),
+            "date": str(day),
+            **counts,
+            "first_call_resolution": get_first_call_resolution(counts),
+            "error": None,
+        }
+        for day, counts in days.items()
+    ]
+
+
+def write_summary(rows: list[dict[str, Any]], summary_path: Path) -> None:
+    if summary_path.suffix.lower() == ".csv":
+        with open(summary_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    else:
+        with open(summary_path, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Batch-process reports without Streamlit")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="number of parallel worker processes"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    case_report_parser = subparsers.add_parser(
+        "case-report", help="format one or more case reports"
+    )
+    case_report_parser.add_argument(
+        "reports", nargs="+", help="case report files, directories, or glob patterns"
+    )
+    case_report_parser.add_argument("--output-dir", type=Path, default=Path("."))
+    case_report_parser.add_argument(
+        "--run-time",
+        type=datetime.fromisoformat,
+        help="report run time, e.g. 2024-03-01T13:00 (defaults to each file's modified time)",
+    )
+    case_report_parser.add_argument(
+        "--write-only",
+        action="store_true",
+        default=WRITE_ONLY,
+        help="stream each report into a new workbook, using less memory for very large teams",
+    )
+    case_report_parser.add_argument("--outstanding", type=float, default=1.0)
+    case_report_parser.add_argument("--outstanding-color", default="#92D050")
+    case_report_parser.add_argument("--exceeds", type=float, default=1.2)
+    case_report_parser.add_argument("--exceeds-color", default="#FFFF00")
+    case_report_parser.add_argument("--competent", type=float, default=2.0)
+    case_report_parser.add_argument("--competent-color", default="#FFC000")
+    case_report_parser.add_argument("--needs-improvement-color", default="#FF0000")
+
+    fcr_parser = subparsers.add_parser(
+        "fcr",
+        help="calculate first call resolution for one or more export directories",
+        description=(
+            "Each directory must hold a re-opened, closed, and parent cases report, "
+            'identified by "reopen", "closed", and "parent" in their file names'
+        ),
+    )
+    fcr_parser.add_argument("report_sets", nargs="+", help="export directories or glob patterns")
+    fcr_parser.add_argument("--date", type=date.fromisoformat, help="single report date")
+    fcr_parser.add_argument("--start", type=date.fromisoformat, help="first date of a range")
+    fcr_parser.add_argument("--end", type=date.fromisoformat, help="last date of a range")
+    fcr_parser.add_argument("--child-case-threshold", type=int, default=4)
+    fcr_parser.add_argument(
+        "--case-store",
+        type=Path,
+        help="SQLite file to accumulate cases in; results then cover every set it has ingested",
+    )
+    fcr_parser.add_argument(
+        "--summary", type=Path, default=Path("fcr_summary.json"), help="a .json or .csv file"
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "fcr" and not (args.date or (args.start and args.end)):
+        parser.error("fcr requires either --date or both --start and --end")
+
+    return args
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    failures = 0
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as pool:
+        if args.command == "case-report":
+            args.output_dir.mkdir(parents=True, exist_ok=True)
+            thresholds = {
+                "outstanding_val": args.outstanding,
+                "outstanding_color": args.outstanding_color,
+                "exceeds_val": args.exceeds,
+                "exceeds_color": args.exceeds_color,
+                "competent_val": args.competent,
+                "competent_color": args.competent_color,
+                "needs_improvement_color": args.needs_improvement_color,
+            }
+            futures = [
+                pool.submit(
+                    run_case_report,
+                    path,
+                    args.output_dir,
+                    args.run_time,
+                    thresholds,
+                    args.write_only,
+                )
+                for path in expand_paths(args.reports)
+            ]
+            for future in futures:
+                result = future.result()
+                if result["error"]:
+                    failures += 1
+                    print(f"{result['report']}: {result['error']}", file=sys.stderr)
+
+                else:
+                    print(f"{result['report']} -> {result['output']}")
+
+                for warning in result.get("warnings", []):
+                    print(f"{result['report']}: {warning}", file=sys.stderr)
+
+                for unmapped in result.get("unmapped_statuses", []):
+                    print(
+                        f"{result['report']}: no rule for status \"{unmapped['status']}\" "
+                        f"({unmapped['agent']}, {unmapped['sheet']}!{unmapped['cell']})",
+                        file=sys.stderr,
+                    )
+
+        else:
+            start_date = args.date or args.start
+            end_date = None if args.date else args.end
+            report_sets = expand_paths(args.report_sets, directories=True)
+
+            # every set is ingested, in order, before any are counted, so each set's results
+            # cover the whole batch rather than whichever sets happened to be ingested first
+            ingest_errors: dict[Path, str] = {}
+            if args.case_store:
+                for report_set in report_sets:
+                    error = ingest_fcr(report_set, args.case_store)
+                    if error:
+                        ingest_errors[report_set] = error
+
+            futures = {
+                report_set: pool.submit(
+                    run_fcr,
+                    report_set,
+                    start_date,
+                    end_date,
+                    args.child_case_threshold,
+                    args.case_store,
+                )
+                for report_set in report_sets
+                if report_set not in ingest_errors
+            }
+
+            summary = []
+            for report_set in report_sets:
+                rows = (
+                    [{"report_set": str(report_set), "error": ingest_errors[report_set]}]
+                    if report_set in ingest_errors
+                    else futures[report_set].result()
+                )
+                summary.extend(rows)
+                for row in rows:
+                    if row["error"]:
+                        failures += 1
+                        print(f"{row['report_set']}: {row['error']}", file=sys.stderr)
+
+            write_summary(summary, args.summary)
+            print(f"Wrote {len(summary)} summary rows to {args.summary}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
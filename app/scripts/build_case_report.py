@@ -1,167 +1,288 @@
+import logging
+import os
 from datetime import datetime
-from tempfile import NamedTemporaryFile
-
-from openpyxl.styles import Alignment
-from openpyxl.styles.borders import Border, Side
-from openpyxl.styles.fills import PatternFill
+from io import BytesIO
+from typing import Any, BinaryIO, Iterable, Iterator, NamedTuple, Optional
+
+from openpyxl import Workbook
+from openpyxl.cell.cell import Cell
+from openpyxl.styles.cell_style import StyleArray
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet._read_only import ReadOnlyWorksheet
+from openpyxl.worksheet._write_only import WriteOnlyWorksheet
 from openpyxl.worksheet.worksheet import Worksheet
-from static import follow_up_and_weight_map
+from openpyxl.xml.constants import SHEET_MAIN_NS
+from openpyxl.xml.functions import iterparse
 
-from scripts.utils import open_workbook
+from scripts.follow_up_rules import RuleTable, load_rule_table
+from scripts.instrumentation import instrumented, stage
+from scripts.jobs import JobCancelled, track
+from scripts.styles import StyleRegistry, style_registry
+from scripts.utils import open_workbook, open_workbook_read_only
 
+logger = logging.getLogger(__name__)
 
-def load_follow_up_and_weight_map() -> dict[str, int | float]:
-    d = follow_up_and_weight_map.get_map()
+# stream reports into a new write-only workbook rather than editing them in place, which
+# keeps memory flat for very large teams but drops pivot table definitions and merged cells
+WRITE_ONLY = os.environ.get("REPORTING_TOOLS_WRITE_ONLY", "").lower() in ("1", "true", "yes", "on")
 
-    # Set all keys to lowercase
-    d = {k.strip().lower(): v for k, v in d.items()}
-    return d
 
+# the report title, which the runtime is appended to, must be within this many rows of the
+# start of the sheet or the end of the previous pivot table
+RUNTIME_SEARCH_ROWS = 101
 
-def write_workbook_runtime(ws: Worksheet, report_datetime: datetime) -> None:
-    """Appends the runtime to the workbook"""
+# the sheet that each agent's calculated figures are written to, as values
+AGENT_SUMMARY_SHEET = "Agent Summary"
+AGENT_SUMMARY_HEADERS = ["Sheet", "Agent", "Statuses", "Average Cycles"]
+AGENT_SUMMARY_WIDTHS = [20, 32, 10, 16]
 
-    datetime_string = report_datetime.strftime("%-m/%-d/%Y at %-I:%M%p").lower()
+ROW_LABELS_INDEX = 0
+AVG_CASE_AGE_INDEX = 1
+CYCLES_INDEX = 3
+WEIGHTS_INDEX = 4
+AVG_CYCLES_INDEX = 5
 
-    for i, row in enumerate(ws.rows):
-        if row[0].value and "workload management report" in row[0].value.lower():
-            row[0].value += datetime_string
+# the roles of the pivot table's rows
+AGENT_ROW = "agent"
+STATUS_ROW = "status"
+GRAND_TOTAL_ROW = "grand_total"
 
-        elif i > 100:
-            raise ValueError(
-                "Cannot find cell to write runtime in. Is the file formatted correctly?"
-            )
 
+class AgentBlock(NamedTuple):
+    name: str
+    header_row: tuple[Cell, ...]
+    rows: list[tuple[Cell, ...]]  # the agent's status rows, in sheet order
 
-def parse_pivot_table_for_cycles_and_weights(
-    ws: Worksheet, follow_up_weight_map: dict
-) -> dict:
-    """
-    Parses the pivot table data to write cycles and weights and blackens unused cells
 
-    Returns a map of agent name to row count and average cycles
-    """
+class CaseReport(NamedTuple):
+    workbook: Optional[bytes]  # None when the workbook was written to an output stream
+    unmapped_statuses: list[dict[str, str]]
+    agent_summary: list[dict[str, Any]]  # see `summarize_agents`
+    warnings: list[str]  # features of the report that formatting it dropped
 
-    row_labels_index = 0
-    avg_case_age_index = 1
 
-    cycles_index = 3
-    weights_index = 4
+class PivotIndex(NamedTuple):
+    title_rows: list[tuple[Cell, ...]]  # rows holding the report title, above the table
+    agents: list[AgentBlock]
+    grand_total_row: Optional[tuple[Cell, ...]]
 
-    cell_alignment = Alignment(horizontal="center")
 
-    last_agent = None
-    agent_row_count = 0
-    agent_cycle_count = 0
-    agent_data_map = {}
+def label_pivot_rows(
+    rows: Iterable[tuple[Cell, ...]],
+) -> Iterator[tuple[tuple[Cell, ...], Optional[str], bool]]:
+    """
+    Yields each row with its role in a pivot table (`AGENT_ROW`, `STATUS_ROW`, `GRAND_TOTAL_ROW`,
+    or None outside of one) and whether it holds the report title
+
+    A sheet may hold several pivot tables one after another, each ending at its Grand Total row
+    """
 
     start_parsing = False
-    for row in ws.rows:
-        # don't start parsing until we get to the pivot table
+    seen_agent = False
+    section_start = 0
+    for i, row in enumerate(rows):
+        label = row[ROW_LABELS_INDEX].value
+        is_title = (
+            i - section_start < RUNTIME_SEARCH_ROWS
+            and isinstance(label, str)
+            and "workload management report" in label.lower()
+        )
+
+        # don't start parsing until we get to a pivot table, and stop at its end
         if not start_parsing:
-            if row[row_labels_index].pivotButton:
+            if row[ROW_LABELS_INDEX].pivotButton:
                 start_parsing = True
 
+            yield row, None, is_title
             continue
 
-        # stop when we've reached the end of the pivot table
-        if row[row_labels_index].value == "Grand Total":
-            break
-
-        # don't run any calculations when we've reached a new agent
-        if row[row_labels_index].alignment.indent.real == 0.0:
-            # map agent and reset agent vars
-            if last_agent:
-                agent_data_map[last_agent] = {
-                    "row_count": agent_row_count,
-                    "average_cycles": float(
-                        round(agent_cycle_count / agent_row_count, 2)
-                    ),
-                }
-            last_agent = row[row_labels_index].value
-            agent_row_count = 0
-            agent_cycle_count = 0
-
-            # black-out unused cycle and weight cells
-            for index in [cycles_index, weights_index]:
-                row[index].fill = PatternFill(
-                    start_color="00000000", end_color="00000000", fill_type="solid"
-                )
+        if label == "Grand Total":
+            start_parsing = False
+            seen_agent = False
+            section_start = i + 1
+            yield row, GRAND_TOTAL_ROW, is_title
 
-            continue
+        # rows without an indent start a new agent
+        elif row[ROW_LABELS_INDEX].alignment.indent.real == 0.0:
+            seen_agent = True
+            yield row, AGENT_ROW, is_title
 
-        # write cycles and weights
-        label = row[row_labels_index].value.strip().lower()
+        elif seen_agent:
+            yield row, STATUS_ROW, is_title
 
-        cycle_cell = row[cycles_index]
-        cycle_cell.value = f"={row[avg_case_age_index].coordinate}/{follow_up_weight_map[label]['follow-up']}"
-        cycle_cell.number_format = "0.00"
-        cycle_cell.alignment = cell_alignment
+        else:
+            raise ValueError("Unable to format workbook. Is the file formatted correctly?")
 
-        weight_cell = row[weights_index]
-        weight_cell.value = (
-            f"={row[cycles_index].coordinate}*{follow_up_weight_map[label]['weight']}"
-        )
-        weight_cell.number_format = "0.00"
-        weight_cell.alignment = cell_alignment
 
-        # track agent rows and cycle count using the weight column calculation
-        cycle_cell_calculation = (
-            row[avg_case_age_index].value / follow_up_weight_map[label]["follow-up"]
-        )
-        weight_cell_calculation = (
-            cycle_cell_calculation * follow_up_weight_map[label]["weight"]
-        )
+@instrumented(rows=lambda pivot_indexes: sum(len(a.rows) for p in pivot_indexes for a in p.agents))
+def index_pivot_tables(ws: Worksheet) -> list[PivotIndex]:
+    """
+    Walks the sheet once, recording each pivot table's structure (each agent's header row
+    and status rows, and the Grand Total row) along with the report title rows above it
 
-        agent_row_count += 1
-        agent_cycle_count += weight_cell_calculation
+    Title rows below the last pivot table are returned in an index of their own
+    """
+
+    pivot_indexes = []
+    pivot_index = PivotIndex([], [], None)
+
+    rows = track(ws.rows, f"Reading {ws.title}", ws.max_row)
+    for row, role, is_title in label_pivot_rows(rows):
+        if is_title:
+            pivot_index.title_rows.append(row)
+
+        if role == AGENT_ROW:
+            pivot_index.agents.append(
+                AgentBlock(name=row[ROW_LABELS_INDEX].value, header_row=row, rows=[])
+            )
+
+        elif role == STATUS_ROW:
+            pivot_index.agents[-1].rows.append(row)
+
+        elif role == GRAND_TOTAL_ROW:
+            pivot_indexes.append(pivot_index._replace(grand_total_row=row))
+            pivot_index = PivotIndex([], [], None)
+
+    if pivot_index.title_rows or pivot_index.agents:
+        pivot_indexes.append(pivot_index)
+
+    return pivot_indexes
+
+
+def format_runtime(report_datetime: datetime) -> str:
+    return report_datetime.strftime("%-m/%-d/%Y at %-I:%M%p").lower()
+
+
+def write_workbook_runtime(pivot_indexes: list[PivotIndex], report_datetime: datetime) -> None:
+    """Appends the runtime to every report title in the workbook"""
+
+    title_rows = [row for pivot_index in pivot_indexes for row in pivot_index.title_rows]
+    if not title_rows:
+        raise ValueError("Cannot find cell to write runtime in. Is the file formatted correctly?")
+
+    datetime_string = format_runtime(report_datetime)
+    for row in title_rows:
+        row[0].value += datetime_string
 
-    # map final agent and return map
-    agent_data_map[last_agent] = {
-        "row_count": agent_row_count,
-        "average_cycles": float(round(agent_cycle_count / agent_row_count, 2)),
-    }
+
+@instrumented()
+def parse_pivot_table_for_cycles_and_weights(
+    pivot_index: PivotIndex,
+    rule_table: RuleTable,
+    styles: StyleRegistry = style_registry,
+    unmapped_statuses: Optional[list[dict[str, str]]] = None,
+) -> dict:
+    """
+    Parses the pivot table data to write cycles and weights and blackens unused cells
+
+    Statuses without a rule are left blank and excluded from the agent's average; each one
+    is recorded in `unmapped_statuses`, if given. Returns a map of agent name to row count
+    and average cycles (None if none of the agent's statuses are mapped)
+    """
+
+    cell_alignment = styles.alignment("center")
+    agent_data_map = {}
+
+    for agent in pivot_index.agents:
+        # black-out unused cycle and weight cells
+        for index in [CYCLES_INDEX, WEIGHTS_INDEX]:
+            agent.header_row[index].fill = styles.solid_fill("00000000")
+
+        agent_row_count = 0
+        agent_cycle_count = 0
+        for row in agent.rows:
+            label = row[ROW_LABELS_INDEX].value
+            rule = rule_table.lookup(label)
+            if rule is None:
+                if unmapped_statuses is not None:
+                    unmapped_statuses.append(
+                        {
+                            "status": str(label).strip(),
+                            "agent": agent.name,
+                            "sheet": row[ROW_LABELS_INDEX].parent.title,
+                            "cell": row[ROW_LABELS_INDEX].coordinate,
+                        }
+                    )
+
+                continue
+
+            # write cycles and weights
+            cycle_cell = row[CYCLES_INDEX]
+            cycle_cell.value = f"={row[AVG_CASE_AGE_INDEX].coordinate}/{rule.follow_up}"
+            cycle_cell.number_format = "0.00"
+            cycle_cell.alignment = cell_alignment
+
+            weight_cell = row[WEIGHTS_INDEX]
+            weight_cell.value = f"={row[CYCLES_INDEX].coordinate}*{rule.weight}"
+            weight_cell.number_format = "0.00"
+            weight_cell.alignment = cell_alignment
+
+            # track agent rows and cycle count using the weight column calculation
+            cycle_cell_calculation = row[AVG_CASE_AGE_INDEX].value / rule.follow_up
+            weight_cell_calculation = cycle_cell_calculation * rule.weight
+
+            agent_row_count += 1
+            agent_cycle_count += weight_cell_calculation
+
+        agent_data_map[agent.name] = {
+            "row_count": agent_row_count,
+            "average_cycles": (
+                float(round(agent_cycle_count / agent_row_count, 2)) if agent_row_count else None
+            ),
+        }
 
     return agent_data_map
 
 
-def write_average_cycle_formulas(
-    ws: Worksheet, agent_data_map: dict, weight_performance_map: dict
-):
-    """Writes the average weight formulas and paints them per the weight performance map"""
+@instrumented()
+def map_agent_cycles(
+    sheet_pivot_indexes: list[list[PivotIndex]],
+    rule_table: RuleTable,
+    unmapped_statuses: list[dict[str, str]],
+) -> list[list[dict]]:
+    """
+    Writes the cycles and weights of every sheet's pivot tables, returning each table's agent
+    map (see `parse_pivot_table_for_cycles_and_weights`) in the same nesting
 
-    row_labels_index = 0
-    weights_index = 4
-    avg_cycles_index = 5
+    Sheets are processed one at a time, since they share the workbook's style tables
+    """
 
-    cell_alignment = Alignment(horizontal="center")
+    sheet_agent_data_maps = []
+    for pivot_indexes in sheet_pivot_indexes:
+        # the undecorated function, so instrumentation doesn't record a stage per table
+        sheet_agent_data_maps.append(
+            [
+                parse_pivot_table_for_cycles_and_weights.__wrapped__(
+                    pivot_index, rule_table, unmapped_statuses=unmapped_statuses
+                )
+                for pivot_index in pivot_indexes
+            ]
+        )
 
-    start_parsing = False
-    for i, row in enumerate(ws.rows):
-        # don't start parsing until we get to the pivot table
-        if not start_parsing:
-            if row[row_labels_index].pivotButton:
-                start_parsing = True
+    return sheet_agent_data_maps
 
-            continue
 
-        # stop when we've reached the end of the pivot table
-        if row[row_labels_index].value == "Grand Total":
-            break
+@instrumented()
+def write_average_cycle_formulas(
+    pivot_index: PivotIndex,
+    agent_data_map: dict,
+    weight_performance_map: dict,
+    styles: StyleRegistry = style_registry,
+):
+    """Writes the average weight formulas and paints them per the weight performance map"""
 
-        # ignore rows that aren't a new agent
-        if row[row_labels_index].alignment.indent.real != 0.0:
-            continue
+    cell_alignment = styles.alignment("center")
 
-        # get agent and number of rows to average
-        agent = row[row_labels_index].value
-        row_count = agent_data_map[agent]["row_count"]
+    for agent in pivot_index.agents:
+        average_cycles = agent_data_map[agent.name]["average_cycles"]
+        if average_cycles is None:
+            continue
 
-        # write average formula
-        avg_cycle_cell = ws[i + 2][avg_cycles_index]
+        # write average formula next to the agent's first status row
+        avg_cycle_cell = agent.rows[0][AVG_CYCLES_INDEX]
 
-        start_cell = ws[i + 2][weights_index].coordinate
-        end_cell = ws[i + row_count + 1][weights_index].coordinate
+        start_cell = agent.rows[0][WEIGHTS_INDEX].coordinate
+        end_cell = agent.rows[-1][WEIGHTS_INDEX].coordinate
 
         avg_cycle_cell.value = f"=AVERAGE({start_cell}:{end_cell})"
         avg_cycle_cell.number_format = "0.00"
@@ -170,23 +291,281 @@ def write_average_cycle_formulas(
         avg_cycle_cell.alignment = cell_alignment
 
         for max_threshold, color in weight_performance_map.items():
-            if (
-                max_threshold == "default"
-                or agent_data_map[agent]["average_cycles"] < max_threshold
-            ):
-                cell_color = f"FF{color[-6:]}"  # convert to aRGB
+            if max_threshold == "default" or average_cycles < max_threshold:
+                avg_cycle_cell.fill = styles.solid_fill(f"FF{color[-6:]}")  # convert to aRGB
+                break
+
+        avg_cycle_cell.border = styles.box_border("medium")
+
+
+def summarize_agents(sheet_title: str, agent_data_map: dict) -> list[dict[str, Any]]:
+    """
+    Returns a row per agent of the agent map with its sheet, name, number of mapped statuses,
+    and average cycles; agents without any mapped statuses are left out
+    """
+
+    return [
+        {
+            "sheet": sheet_title,
+            "agent": agent_name,
+            "statuses": agent_data["row_count"],
+            "average_cycles": agent_data["average_cycles"],
+        }
+        for agent_name, agent_data in agent_data_map.items()
+        if agent_data["average_cycles"] is not None
+    ]
+
+
+def write_agent_summary(
+    ws: Worksheet | WriteOnlyWorksheet,
+    agent_summary: list[dict[str, Any]],
+) -> None:
+    """
+    Writes the agent summary to the sheet as plain values, so tools that read the workbook's
+    cached values rather than its formulas (e.g. openpyxl's `data_only`) still get numbers
+    """
+
+    # write-only sheets need their column widths set before any rows
+    for i, width in enumerate(AGENT_SUMMARY_WIDTHS, 1):
+        ws.column_dimensions[get_column_letter(i)].width = width
+
+    ws.append(AGENT_SUMMARY_HEADERS)
+    for row, agent in enumerate(agent_summary, 2):
+        average_cycles_cell = Cell(ws, row=row, column=4, value=agent["average_cycles"])
+        average_cycles_cell.number_format = "0.00"
+        ws.append([agent["sheet"], agent["agent"], agent["statuses"], average_cycles_cell])
+
+
+COL_TAG = f"{{{SHEET_MAIN_NS}}}col"
+SHEET_DATA_TAG = f"{{{SHEET_MAIN_NS}}}sheetData"
+MERGE_CELLS_TAG = b"mergeCells"
+
+# bytes of a sheet's XML read at a time when looking for merged cells
+SCAN_CHUNK_SIZE = 1 << 20
+
+
+class StyleCopier:
+    """Copies read-only cells into a write-only worksheet, creating each distinct style once"""
+
+    def __init__(self, ws: WriteOnlyWorksheet) -> None:
+        self.ws = ws
+        self._styles: dict[tuple[int, ...], StyleArray] = {}
+
+    def copy(self, source: Any, row: int, column: int) -> Cell:
+        if not getattr(source, "has_style", False):
+            cell = Cell(self.ws, row=row, column=column, value=source.value)
+
+        else:
+            key = tuple(source.style_array)
+            if key in self._styles:
+                cell = Cell(
+                    self.ws,
+                    row=row,
+                    column=column,
+                    value=source.value,
+                    style_array=self._styles[key],
+                )
+
+            else:
+                cell = Cell(self.ws, row=row, column=column, value=source.value)
+                cell.font = source.font
+                cell.fill = source.fill
+                cell.border = source.border
+                cell.alignment = source.alignment
+                cell.number_format = source.number_format
+                cell.protection = source.protection
+                cell.pivotButton = source.style_array.pivotButton
+                cell.quotePrefix = source.style_array.quotePrefix
+                self._styles[key] = StyleArray(cell._style)  # pylint: disable=protected-access
+
+        # keep text that starts with "=" from becoming a formula
+        if source.data_type == "s":
+            cell.data_type = "s"
+
+        return cell
+
+
+def copy_column_widths(source: ReadOnlyWorksheet, ws: WriteOnlyWorksheet) -> None:
+    """Copies the column widths, which read-only worksheets don't expose, from the sheet's XML"""
+
+    # the column definitions come before the cells, so only the start of the sheet is parsed
+    with source._get_source() as xml:  # pylint: disable=protected-access
+        for _, element in iterparse(xml, events=("start",)):
+            if element.tag == SHEET_DATA_TAG:
                 break
 
-        avg_cycle_cell.fill = PatternFill(
-            start_color=cell_color, end_color=cell_color, fill_type="solid"
+            if element.tag == COL_TAG and element.get("width"):
+                first, last = int(element.get("min")), int(element.get("max"))
+                dimension = ws.column_dimensions[get_column_letter(first)]
+                dimension.min, dimension.max = first, last
+                dimension.width = float(element.get("width"))
+                dimension.hidden = element.get("hidden") in ("1", "true")
+
+
+def has_merged_cells(source: ReadOnlyWorksheet) -> bool:
+    """Returns whether the sheet has merged cells, which read-only worksheets don't expose"""
+
+    # they're listed after the cells, so the XML is searched as bytes rather than parsed
+    overlap = b""
+    with source._get_source() as xml:  # pylint: disable=protected-access
+        while chunk := xml.read(SCAN_CHUNK_SIZE):
+            if MERGE_CELLS_TAG in overlap + chunk:
+                return True
+
+            overlap = chunk[1 - len(MERGE_CELLS_TAG) :]
+
+    return False
+
+
+def find_dropped_features(source: Workbook) -> list[str]:
+    """Returns a warning for each feature of the report that streaming it would drop"""
+
+    warnings = []
+    part_names = source._archive.namelist()  # pylint: disable=protected-access
+    if any(name.startswith("xl/pivotTables/") for name in part_names):
+        warnings.append(
+            "Pivot table definitions aren't kept in write-only mode, so the formatted report's "
+            "pivot tables are plain cells"
         )
 
-        border_side = Side(style="medium")
-        avg_cycle_cell.border = Border(
-            left=border_side, right=border_side, top=border_side, bottom=border_side
+    merged_sheets = [ws.title for ws in source.worksheets if has_merged_cells(ws)]
+    if merged_sheets:
+        warnings.append(
+            "Merged cells aren't kept in write-only mode, so they're unmerged on "
+            + ", ".join(merged_sheets)
         )
 
+    return warnings
+
+
+def copy_rows(source: ReadOnlyWorksheet, ws: WriteOnlyWorksheet) -> Iterator[tuple[Cell, ...]]:
+    """Yields the sheet's rows as cells of `ws`, numbered as they'll be written"""
+
+    copier = StyleCopier(ws)
+    for i, row in enumerate(source.rows, 1):
+        yield tuple(copier.copy(cell, i, j) for j, cell in enumerate(row, 1))
+
+
+def append_row(ws: WriteOnlyWorksheet, row: tuple[Cell, ...]) -> None:
+    # leave out empty, unstyled cells, as a saved workbook would
+    ws.append([cell if cell.value is not None or cell.has_style else None for cell in row])
+
+
+def stream_pivot_sheet(
+    source: ReadOnlyWorksheet,
+    ws: WriteOnlyWorksheet,
+    report_datetime: datetime,
+    rule_table: RuleTable,
+    weight_performance_map: dict,
+    unmapped_statuses: list[dict[str, str]],
+    agent_summary: list[dict[str, Any]],
+) -> bool:
+    """
+    Copies the sheet into `ws` row by row, formatting each agent's block of its pivot tables
+    as it's reached, so only one agent's rows are held in memory at a time
+
+    Returns whether the sheet held a report title for the runtime to be written to
+    """
+
+    def write_agent(agent: AgentBlock) -> None:
+        pivot_index = PivotIndex([], [agent], None)
+
+        # the undecorated functions, so instrumentation doesn't record a stage per agent
+        agent_data_map = parse_pivot_table_for_cycles_and_weights.__wrapped__(
+            pivot_index, rule_table, unmapped_statuses=unmapped_statuses
+        )
+        write_average_cycle_formulas.__wrapped__(
+            pivot_index, agent_data_map, weight_performance_map
+        )
+        agent_summary.extend(summarize_agents(source.title, agent_data_map))
 
+        for row in [agent.header_row, *agent.rows]:
+            append_row(ws, row)
+
+    datetime_string = format_runtime(report_datetime)
+    found_title = False
+    agent: Optional[AgentBlock] = None
+    rows = track(copy_rows(source, ws), f"Formatting {source.title}", source.max_row)
+    for row, role, is_title in label_pivot_rows(rows):
+        if is_title:
+            row[0].value += datetime_string
+            found_title = True
+
+        if role in (AGENT_ROW, GRAND_TOTAL_ROW) and agent is not None:
+            write_agent(agent)
+            agent = None
+
+        if role == AGENT_ROW:
+            agent = AgentBlock(name=row[ROW_LABELS_INDEX].value, header_row=row, rows=[])
+
+        elif role == STATUS_ROW and agent is not None:
+            agent.rows.append(row)
+
+        else:
+            append_row(ws, row)
+
+    if agent is not None:
+        write_agent(agent)
+
+    return found_title
+
+
+@instrumented()
+def stream_workbook(
+    report_file,
+    report_datetime: datetime,
+    rule_table: RuleTable,
+    weight_performance_map: dict,
+    unmapped_statuses: list[dict[str, str]],
+    agent_summary: list[dict[str, Any]],
+    warnings: list[str],
+) -> Workbook:
+    """
+    Formats the report into a new write-only workbook, streaming its rows from the original
+
+    Cell values, styles, and column widths are carried over; pivot table definitions, merged
+    cells, and other sheet features aren't, so the pivot tables become plain cells, and
+    `warnings` notes any the report had. Sheets are written one after another, as
+    write-only workbooks require
+    """
+
+    source = open_workbook_read_only(report_file, "Case Report")
+    try:
+        warnings.extend(find_dropped_features(source))
+        wb = Workbook(write_only=True)
+        found_title = False
+        for source_ws in source.worksheets:
+            ws = wb.create_sheet(source_ws.title)
+            copy_column_widths(source_ws, ws)
+
+            # rows are only padded to full width when the sheet declares its dimensions
+            if source_ws.max_column is None:
+                source_ws.calculate_dimension(force=True)
+
+            found_title |= stream_pivot_sheet(
+                source_ws,
+                ws,
+                report_datetime,
+                rule_table,
+                weight_performance_map,
+                unmapped_statuses,
+                agent_summary,
+            )
+
+        if not found_title:
+            raise ValueError(
+                "Cannot find cell to write runtime in. Is the file formatted correctly?"
+            )
+
+        write_agent_summary(wb.create_sheet(AGENT_SUMMARY_SHEET), agent_summary)
+        wb.active = source.index(source.active)
+        return wb
+
+    finally:
+        source.close()
+
+
+@instrumented("case_report")
 def main(
     report_file,
     report_datetime: datetime,
@@ -197,9 +576,23 @@ def main(
     competent_val: float,
     competent_color: str,
     needs_improvement_color: str,
-):
+    output: Optional[BinaryIO] = None,
+    write_only: bool = WRITE_ONLY,
+) -> CaseReport:
+    """
+    Formats the case report and returns the new workbook's contents, or writes them
+    to `output` (any writable binary stream) if given, along with any statuses that
+    have no follow-up and weight rule and a summary of each agent's figures, which is
+    also written to its own sheet
 
-    follow_up_weight_map = load_follow_up_and_weight_map()
+    With `write_only`, the report is streamed into a new workbook (see `stream_workbook`)
+    rather than edited in place, and the returned warnings note what that dropped
+    """
+
+    rule_table = load_rule_table()
+    unmapped_statuses: list[dict[str, str]] = []
+    agent_summary: list[dict[str, Any]] = []
+    warnings: list[str] = []
 
     weight_performance_map: dict[float | str, str] = {
         float(outstanding_val): outstanding_color,
@@ -208,24 +601,68 @@ def main(
         "default": needs_improvement_color,
     }
 
+    if write_only:
+        try:
+            wb = stream_workbook(
+                report_file,
+                report_datetime,
+                rule_table,
+                weight_performance_map,
+                unmapped_statuses,
+                agent_summary,
+                warnings,
+            )
+
+        except (ValueError, JobCancelled):
+            raise
+
+        except Exception as e:
+            logger.exception("Unable to stream the case report into a write-only workbook")
+            raise ValueError("Unable to format workbook. Is the file formatted correctly?") from e
+
+        return save_case_report(wb, unmapped_statuses, agent_summary, warnings, output)
+
     wb = open_workbook(report_file, "Case Report")
-    ws = wb.active
-    write_workbook_runtime(ws, report_datetime)
+    sheet_pivot_indexes = [index_pivot_tables(ws) for ws in wb.worksheets]
+    write_workbook_runtime(
+        [pivot_index for pivot_indexes in sheet_pivot_indexes for pivot_index in pivot_indexes],
+        report_datetime,
+    )
 
     try:
-        agent_data_map = parse_pivot_table_for_cycles_and_weights(
-            ws, follow_up_weight_map
+        sheet_agent_data_maps = map_agent_cycles(
+            sheet_pivot_indexes, rule_table, unmapped_statuses
         )
 
-        write_average_cycle_formulas(ws, agent_data_map, weight_performance_map)
+        for ws, pivot_indexes, agent_data_maps in zip(
+            wb.worksheets, sheet_pivot_indexes, sheet_agent_data_maps
+        ):
+            for pivot_index, agent_data_map in zip(pivot_indexes, agent_data_maps):
+                write_average_cycle_formulas(pivot_index, agent_data_map, weight_performance_map)
+                agent_summary.extend(summarize_agents(ws.title, agent_data_map))
 
     except Exception as e:
-        print(e)
-        raise ValueError(
-            "Unable to format workbook. Is the file formatted correctly?"
-        ) from e
-
-    f = NamedTemporaryFile(delete=False)
-    wb.save(f.name)
-
-    return f.name
+        logger.exception("Unable to format the case report")
+        raise ValueError("Unable to format workbook. Is the file formatted correctly?") from e
+
+    write_agent_summary(wb.create_sheet(AGENT_SUMMARY_SHEET), agent_summary)
+    return save_case_report(wb, unmapped_statuses, agent_summary, warnings, output)
+
+
+def save_case_report(
+    wb: Workbook,
+    unmapped_statuses: list[dict[str, str]],
+    agent_summary: list[dict[str, Any]],
+    warnings: list[str],
+    output: Optional[BinaryIO],
+) -> CaseReport:
+    """Saves the formatted workbook to `output`, or into the returned report if not given"""
+
+    with stage("save_workbook"):
+        if output is not None:
+            wb.save(output)
+            return CaseReport(None, unmapped_statuses, agent_summary, warnings)
+
+        f = BytesIO()
+        wb.save(f)
+        return CaseReport(f.getvalue(), unmapped_statuses, agent_summary, warnings)
@@ -0,0 +1,153 @@
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+# returned by lookups that miss, since None is a valid cached value
+MISSING = object()
+
+# limits for the process-wide parse cache; a size of 0 disables caching
+CACHE_MAX_MB = float(os.environ.get("REPORTING_TOOLS_CACHE_MB", 256))
+CACHE_MAX_ENTRIES = int(os.environ.get("REPORTING_TOOLS_CACHE_ENTRIES", 32))
+
+HASH_CHUNK_SIZE = 1 << 20
+
+# number of items measured when estimating the size of a large collection
+SIZE_SAMPLE = 100
+
+
+def hash_upload(report_file: Any) -> str:
+    """Returns the SHA-256 digest of the file's contents, leaving it rewound"""
+
+    digest = hashlib.sha256()
+    report_file.seek(0)
+    while chunk := report_file.read(HASH_CHUNK_SIZE):
+        digest.update(chunk if isinstance(chunk, bytes) else chunk.encode())
+
+    report_file.seek(0)
+    return digest.hexdigest()
+
+
+def estimate_size(value: Any) -> int:
+    """Roughly estimates the memory held by a value, sampling large collections"""
+
+    if isinstance(value, (str, bytes, int, float, bool, date, datetime)) or value is None:
+        return sys.getsizeof(value)
+
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+
+    if isinstance(value, dict):
+        items = list(value.items())
+        size = sys.getsizeof(value)
+        sample = items[:SIZE_SAMPLE]
+        if sample:
+            sampled = sum(estimate_size(k) + estimate_size(v) for k, v in sample)
+            size += sampled * len(items) // len(sample)
+
+        return size
+
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = list(value)
+        size = sys.getsizeof(value)
+        sample = items[:SIZE_SAMPLE]
+        if sample:
+            size += sum(estimate_size(v) for v in sample) * len(items) // len(sample)
+
+        return size
+
+    return sys.getsizeof(value)
+
+
+class ParseCache:
+    """
+    A thread-safe LRU cache of parsed report data, keyed on the hash of the uploaded file
+
+    Entries are evicted least-recently-used first once either the entry or the (estimated)
+    memory limit is exceeded. Cached values are shared, so callers must not mutate them
+    """
+
+    def __init__(self, max_bytes: int, max_entries: int) -> None:
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+        self._entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.max_entries > 0
+
+    def get_or_load(self, report_file: Any, key: Hashable, loader: Callable[[], T]) -> T:
+        """Returns the cached value for this file and key, calling `loader` on a miss"""
+
+        if not self.enabled:
+            return loader()
+
+        cache_key = self.key_for(report_file, key)
+        value = self.get(cache_key, MISSING)
+        if value is MISSING:
+            value = loader()
+            self.put(cache_key, value)
+
+        return value
+
+    def key_for(self, report_file: Any, key: Hashable) -> Hashable:
+        return (hash_upload(report_file), key)
+
+    def get(self, cache_key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if cache_key not in self._entries:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            self._entries.move_to_end(cache_key)
+            return self._entries[cache_key][0]
+
+    def put(self, cache_key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if cache_key in self._entries:
+                self.total_bytes -= self._entries.pop(cache_key)[1]
+
+            self._entries[cache_key] = (value, size)
+            self.total_bytes += size
+
+            while self.total_bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+            }
+
+
+parse_cache = ParseCache(max_bytes=int(CACHE_MAX_MB * 1024 * 1024), max_entries=CACHE_MAX_ENTRIES)
@@ -1,98 +1,523 @@
-from typing import Any, List, Optional, Tuple
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, time
+from io import BytesIO
+from operator import attrgetter, itemgetter
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Hashable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+
+from scripts.cache import MISSING, parse_cache
+from scripts.instrumentation import instrumented, stage
+from scripts.jobs import track
+from scripts.utils import DatetimeParser, open_report
+
+if TYPE_CHECKING:
+    from scripts.case_store import CaseStore
+
+# uploads are only parsed in parallel when their combined size is at least this large,
+# since smaller files parse faster than worker processes can be started and fed
+PARALLEL_MIN_MB = float(os.environ.get("REPORTING_TOOLS_PARALLEL_MIN_MB", 5))
+
+# an upload's cases are read and cached in full, so other dates are served without parsing it
+# again, only while they'd take up at most this share of the parse cache; larger uploads only
+# have the requested dates read, streaming past the rest
+WHOLE_REPORT_CACHE_SHARE = 0.25
+
+# roughly how much memory the cases read from each byte of an upload take, as the parse cache
+# estimates it; xlsx exports, being compressed, are the densest at about 13
+CASE_BYTES_PER_UPLOAD_BYTE = 15
+
+logger = logging.getLogger(__name__)
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+# the columns read from the re-opened and closed reports, besides their date column
+CASE_COLUMNS = ["Case Number", "Case Owner", "Status", "Open", "Closed", "Was Escalated"]
+
+
+class Case(NamedTuple):
+    datetime: datetime
+    case_number: Any
+    case_owner: Any
+    status: Any
+    is_open: bool
+    is_closed: bool
+    was_escalated: bool
+    is_reopened: bool
+
+
+class MissingColumnsError(ValueError):
+    pass
+
+
+def resolve_columns(
+    headers: Sequence[Any], report_date_column: str, file_display_name: str
+) -> Callable[[Sequence[Any]], tuple]:
+    """
+    Maps the case columns to their positions in the header row, raising if any are missing
+
+    Returns a getter that picks the date column followed by the `CASE_COLUMNS` from a row
+    """
+
+    columns = [report_date_column, *CASE_COLUMNS]
+    missing = [column for column in columns if column not in headers]
+    if missing:
+        raise MissingColumnsError(
+            f"{file_display_name} file is missing the "
+            + ", ".join(f'"{column}"' for column in missing)
+            + f" column{'s' if len(missing) > 1 else ''}"
+        )
 
-from dateutil.parser import parse as parse_date
+    headers = list(headers)
+    return itemgetter(*[headers.index(column) for column in columns])
 
-from scripts.utils import open_workbook
 
+def format_row(values: tuple, is_reopened: bool) -> Case:
+    """Builds a case from the values picked by `resolve_columns`, date first"""
 
-def format_row(headers, row, report_date_column, is_reopened) -> dict[str, Any]:
-    return {
-        "datetime": row[headers.index(report_date_column)].value,
-        "case_number": row[headers.index("Case Number")].value,
-        "case_owner": row[headers.index("Case Owner")].value,
-        "status": row[headers.index("Status")].value,
-        "is_open": bool(int(row[headers.index("Open")].value)),
-        "is_closed": bool(int(row[headers.index("Closed")].value)),
-        "was_escalated": bool(int(row[headers.index("Was Escalated")].value)),
-        "is_reopened": is_reopened,
-    }
+    report_datetime, case_number, case_owner, status, is_open, is_closed, was_escalated = values
 
+    # _make skips the keyword handling of Case(...), which adds up over every row
+    return Case._make(
+        (
+            report_datetime,
+            case_number,
+            case_owner,
+            status,
+            bool(int(is_open)),
+            bool(int(is_closed)),
+            bool(int(was_escalated)),
+            is_reopened,
+        )
+    )
 
-def get_cases(
-    report_date, report_file, report_date_column, is_reopened, file_display_name
-) -> List[dict[str, Any]]:
 
-    wb = open_workbook(report_file, file_display_name)
-    ws = wb.active
+def cases_cache_key(
+    report_date_column, is_reopened, date_range: Optional[Tuple[date, date]] = None
+) -> Hashable:
+    """The cache key of a report's cases between the dates in `date_range`, or all of them"""
 
-    try:
-        cases = []
-        for i, row in enumerate(ws.rows):
-            if not i:
-                headers = [c.value for c in row]
-                report_date_index = headers.index(report_date_column)
-                continue
+    return ("cases", report_date_column, is_reopened, date_range)
 
-            timestamp_cell = row[report_date_index]
-            if isinstance(timestamp_cell.value, str):
-                timestamp_cell.value = parse_date(timestamp_cell.value)
 
-            if timestamp_cell.value.date() != report_date:
-                continue
+def read_cases(
+    report_date,
+    report_file,
+    report_date_column,
+    is_reopened,
+    file_display_name,
+    end_date: date,
+) -> List[Case]:
+    """Reads the cases between `report_date` and `end_date` (inclusive) from the report"""
 
-            cases.append(format_row(headers, row, report_date_column, is_reopened))
+    try:
+        cases = []
+        parse_date = DatetimeParser()
+        with stage("read_cases", file=file_display_name) as current, open_report(
+            report_file, file_display_name, date_columns=[report_date_column]
+        ) as table:
+            # sorted exports only yield the rows from the dates asked for
+            rows = (
+                table.rows()
+                if (report_date, end_date) == (date.min, date.max)
+                else table.rows_between(
+                    report_date_column,
+                    datetime.combine(report_date, time.min),
+                    datetime.combine(end_date, time.max),
+                )
+            )
+            # the row count is only an upper bound when some dates' rows are skipped
+            rows = iter(track(rows, f"Reading {file_display_name}", table.row_count()))
+            get_values = resolve_columns(next(rows, ()), report_date_column, file_display_name)
+
+            i = 0
+            for i, row in enumerate(rows, 1):
+                values = get_values(row)
+                if isinstance(values[0], str):
+                    values = (parse_date(values[0]), *values[1:])
+
+                if not report_date <= values[0].date() <= end_date:
+                    continue
+
+                cases.append(format_row(values, is_reopened))
+
+            current.rows = i
 
         return cases
 
+    except MissingColumnsError:
+        raise
+
     except ValueError as e:
         raise ValueError(
             f"Unable to parse columns for {file_display_name} file; is it in the right format?"
         ) from e
 
 
-def keep_unique_case_by_newest_datetime(
-    cases: List[dict[str, Any]]
-) -> List[dict[str, Any]]:
+def read_cases_by_day(
+    report_file, report_date_column, is_reopened, file_display_name
+) -> dict[date, List[Case]]:
+    """Reads every case from the report, grouped by date with each day's in report order"""
+
+    cases_by_day: dict[date, List[Case]] = {}
+    for case in read_cases(
+        date.min, report_file, report_date_column, is_reopened, file_display_name, date.max
+    ):
+        cases_by_day.setdefault(case.datetime.date(), []).append(case)
+
+    return cases_by_day
+
+
+def cases_between(
+    cases_by_day: dict[date, List[Case]], start_date: date, end_date: date
+) -> List[Case]:
+    """Returns the cases from `start_date` to `end_date` (inclusive), in date order"""
+
+    return [
+        case
+        for day, day_cases in sorted(cases_by_day.items())
+        if start_date <= day <= end_date
+        for case in day_cases
+    ]
+
+
+def keep_unique_case_by_newest_datetime(cases: List[Case]) -> List[Case]:
     # sort by case number asc, datetime desc
-    cases.sort(key=lambda x: x["datetime"], reverse=True)
-    cases.sort(key=lambda x: x["case_number"])
+    cases.sort(key=attrgetter("datetime"), reverse=True)
+    cases.sort(key=attrgetter("case_number"))
 
     # remove duplicates
     case_numbers = set()
-    unique_cases: List[dict[str, Any]] = []
+    unique_cases: List[Case] = []
     for case in cases:
-        if case["case_number"] not in case_numbers:
-            case_numbers.add(case["case_number"])
+        if case.case_number not in case_numbers:
+            case_numbers.add(case.case_number)
             unique_cases.append(case)
 
     return unique_cases
 
 
+class Subtotals:
+    """
+    The parent cases report's subtotals in ascending order, with their suffix sums, so the
+    child case count for any threshold is a binary search rather than a pass over them all
+    """
+
+    def __init__(self, case_counts: Sequence[int]) -> None:
+        values = np.asarray(case_counts) if len(case_counts) else np.zeros(0, dtype=np.int64)
+        self.case_counts = np.sort(values)
+
+        # totals[i] is the sum of case_counts[i:], with a trailing 0 past the largest
+        self.totals = np.append(np.cumsum(self.case_counts[::-1])[::-1], 0)
+
+    def __len__(self) -> int:
+        return len(self.case_counts)
+
+    def count_child_cases(self, child_case_threshold) -> int:
+        """Sums the subtotals that meet the threshold"""
+
+        return self.totals[np.searchsorted(self.case_counts, child_case_threshold)].item()
+
+    def sweep(self, child_case_thresholds: Sequence[Any]) -> List[int]:
+        """Sums the subtotals that meet each of the thresholds"""
+
+        return self.totals[np.searchsorted(self.case_counts, child_case_thresholds)].tolist()
+
+
+def read_subtotals(report_file, whitespace_offset=1) -> Subtotals:
+    """Reads the case count of every "Subtotal" row in the parent cases report"""
+
+    subtotals = []
+    with stage("read_subtotals") as current, open_report(
+        report_file, file_display_name="Parent Cases Report"
+    ) as table:
+        i = 0
+        rows = track(table.rows(), "Reading Parent Cases Report", table.row_count())
+        for i, row in enumerate(rows, 1):
+            if row[whitespace_offset] == "Subtotal":
+                # csv, html, and xls exports read counts from a column with blanks as floats
+                subtotals.append(int(row[whitespace_offset + 2]))
+
+        current.rows = i
+
+    return Subtotals(subtotals)
+
+
+def get_subtotals(report_file, whitespace_offset=1) -> Subtotals:
+    # the subtotals don't depend on the threshold, so changing it doesn't re-parse the report
+    return parse_cache.get_or_load(
+        report_file,
+        ("subtotals", whitespace_offset),
+        lambda: read_subtotals(report_file, whitespace_offset),
+    )
+
+
 def get_child_case_count(report_file, child_case_threshold, whitespace_offset=1) -> int:
-    wb = open_workbook(report_file, file_display_name="Parent Cases Report")
-    ws = wb.active
-    child_case_count: int = 0
+    return count_child_cases(get_subtotals(report_file, whitespace_offset), child_case_threshold)
+
+
+def count_child_cases(subtotals: Subtotals, child_case_threshold) -> int:
+    return subtotals.count_child_cases(child_case_threshold)
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+
+    if _process_pool is None:
+        # the app's server and job threads may hold locks when a worker starts, which a forked
+        # worker would inherit still held, so workers start from a clean process instead
+        start_method = (
+            "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        )
+        _process_pool = ProcessPoolExecutor(
+            max_workers=3, mp_context=multiprocessing.get_context(start_method)
+        )
+
+    return _process_pool
+
 
-    # find the "Subtotal" rows and sum them if they exceed the threshold
-    for row in ws.rows:
-        if row[whitespace_offset].value == "Subtotal":
-            case_count = row[whitespace_offset + 2].value
-            if case_count >= child_case_threshold:
-                child_case_count += case_count
+def discard_process_pool(pool: ProcessPoolExecutor) -> None:
+    """Shuts down a broken pool so the next parallel load starts a fresh one"""
+    global _process_pool
 
-    return child_case_count
+    pool.shutdown(wait=False, cancel_futures=True)
+    if _process_pool is pool:
+        _process_pool = None
 
 
-def get_closed_and_escalated_cases(
-    cases: List[dict[str, Any]]
-) -> Tuple[List[dict[str, Any]], List[dict[str, Any]]]:
+def get_file_size(report_file) -> int:
+    report_file.seek(0, os.SEEK_END)
+    size = report_file.tell()
+    report_file.seek(0)
+    return size
+
+
+def caches_whole_report(report_file) -> bool:
+    """Whether the upload is small enough for all of its cases to be read and cached at once"""
+
+    return (
+        parse_cache.enabled
+        and get_file_size(report_file) * CASE_BYTES_PER_UPLOAD_BYTE
+        <= parse_cache.max_bytes * WHOLE_REPORT_CACHE_SHARE
+    )
+
+
+def _read_from_bytes(reader: Callable[..., Any], data: bytes, kwargs: dict) -> Any:
+    return reader(report_file=BytesIO(data), **kwargs)
+
+
+def load_reports(jobs: List[Tuple[Any, Hashable, Callable[..., Any], dict]]) -> List[Any]:
+    """
+    Runs `reader(report_file=report_file, **kwargs)` for each (report_file, cache key, reader,
+    kwargs) job and returns the results in order, serving what it can from the parse cache
+
+    When more than one report needs parsing and they're large enough, they're parsed
+    concurrently in worker processes. Errors are raised in job order either way, so the
+    first bad file is the one reported.
+    """
+
+    results: List[Any] = [MISSING] * len(jobs)
+    cache_keys: List[Hashable] = [None] * len(jobs)
+    for i, (report_file, key, _, _) in enumerate(jobs):
+        if parse_cache.enabled:
+            cache_keys[i] = parse_cache.key_for(report_file, key)
+            results[i] = parse_cache.get(cache_keys[i], MISSING)
+
+    pending = [i for i, result in enumerate(results) if result is MISSING]
+    pending_bytes = sum(get_file_size(jobs[i][0]) for i in pending)
+
+    with stage(
+        "load_reports", parsed=len(pending), megabytes=round(pending_bytes / 1024**2, 2)
+    ) as current:
+        futures = {}
+        pool = None
+        if len(pending) > 1 and pending_bytes >= PARALLEL_MIN_MB * 1024 * 1024:
+            try:
+                pool = get_process_pool()
+                for i in pending:
+                    report_file, _, reader, kwargs = jobs[i]
+                    report_file.seek(0)
+                    futures[i] = pool.submit(_read_from_bytes, reader, report_file.read(), kwargs)
+
+            except (BrokenProcessPool, OSError, RuntimeError):
+                # fall back to parsing serially if worker processes aren't available
+                logger.warning(
+                    "Unable to parse reports in parallel, parsing serially", exc_info=True
+                )
+                if pool is not None:
+                    discard_process_pool(pool)
+                futures = {}
+
+        # stages run in worker processes aren't recorded here, only this stage's wall time
+        current.fields["parallel"] = bool(futures)
+
+        for i in pending:
+            report_file, _, reader, kwargs = jobs[i]
+            if i in futures:
+                try:
+                    results[i] = futures[i].result()
+
+                except BrokenProcessPool:
+                    # a worker died, taking the pool with it; this and the remaining reports
+                    # are parsed here instead
+                    if pool is not None:
+                        logger.warning("A report parsing worker died, parsing serially")
+                        discard_process_pool(pool)
+                        pool = None
+                    results[i] = reader(report_file=report_file, **kwargs)
+
+            else:
+                results[i] = reader(report_file=report_file, **kwargs)
+
+            parse_cache.put(cache_keys[i], results[i])
+
+    return results
+
+
+def load_fcr_reports(
+    start_date: date,
+    end_date: date,
+    fcr_reopened_file,
+    fcr_closed_file,
+    fcr_parent_file,
+    load_parent: bool = True,
+) -> Tuple[List[Case], List[Case], Optional[Subtotals]]:
+    """
+    Loads the re-opened and closed cases between the two dates (inclusive), and the
+    parent case subtotals if `load_parent` is set
+
+    With the parse cache enabled, uploads small enough (see `caches_whole_report`) have all
+    their cases read and cached, so asking for other dates doesn't parse them again; larger
+    ones only have the requested dates read, keeping memory flat. The returned lists may be
+    shared with the parse cache, so they must not be modified
+    """
+
+    jobs: List[Tuple[Any, Hashable, Callable[..., Any], dict]] = []
+    for report_file, report_date_column, is_reopened, file_display_name in [
+        (fcr_reopened_file, "Edit Date", True, "Re-opened Report"),
+        (fcr_closed_file, "Date/Time Opened", False, "Closed Report"),
+    ]:
+        kwargs = {
+            "report_date_column": report_date_column,
+            "is_reopened": is_reopened,
+            "file_display_name": file_display_name,
+        }
+        if caches_whole_report(report_file):
+            jobs.append(
+                (
+                    report_file,
+                    cases_cache_key(report_date_column, is_reopened),
+                    read_cases_by_day,
+                    kwargs,
+                )
+            )
+
+        else:
+            jobs.append(
+                (
+                    report_file,
+                    cases_cache_key(report_date_column, is_reopened, (start_date, end_date)),
+                    read_cases,
+                    {**kwargs, "report_date": start_date, "end_date": end_date},
+                )
+            )
+
+    if load_parent:
+        jobs.append((fcr_parent_file, ("subtotals", 1), read_subtotals, {}))
+
+    results = load_reports(jobs)
+    reopened_cases, closed_cases = [
+        cases_between(cases, start_date, end_date) if reader is read_cases_by_day else cases
+        for cases, (_, _, reader, _) in zip(results[:2], jobs)
+    ]
+
+    return reopened_cases, closed_cases, results[2] if load_parent else None
+
+
+def get_closed_and_escalated_cases(cases: List[Case]) -> Tuple[List[Case], List[Case]]:
     # filter to only cases that are not re-opened
-    closed_cases = [case for case in cases if not case["is_reopened"]]
-    escalated_cases = [case for case in closed_cases if case["was_escalated"]]
+    closed_cases = [case for case in cases if not case.is_reopened]
+    escalated_cases = [case for case in closed_cases if case.was_escalated]
 
     return closed_cases, escalated_cases
 
 
+def ingest_fcr_reports(case_store: "CaseStore", fcr_reopened_file, fcr_closed_file) -> None:
+    """Adds the re-opened and closed reports to the case store, skipping uploads already seen"""
+
+    case_store.ingest(fcr_reopened_file, "Edit Date", True, "Re-opened Report")
+    case_store.ingest(fcr_closed_file, "Date/Time Opened", False, "Closed Report")
+
+
+def count_stored_cases(
+    case_store: "CaseStore",
+    start_date: date,
+    end_date: date,
+    fcr_reopened_file,
+    fcr_closed_file,
+) -> dict[date, dict[str, int]]:
+    """
+    Ingests the re-opened and closed reports into the case store, skipping uploads it has
+    already seen, then counts the stored cases of each day from `start_date` to `end_date`
+    """
+
+    ingest_fcr_reports(case_store, fcr_reopened_file, fcr_closed_file)
+
+    with stage("count_stored_cases"):
+        return case_store.count_cases(start_date, end_date)
+
+
+COUNT_KEYS = ["closed_case_count", "escalated_case_count", "child_case_count", "total_cases"]
+
+
+def get_case_counts(cases: List[Case], child_case_count: int) -> dict[str, int]:
+    closed_cases, escalated_cases = get_closed_and_escalated_cases(cases)
+
+    return {
+        "closed_case_count": len(closed_cases),
+        "escalated_case_count": len(escalated_cases),
+        "child_case_count": child_case_count,
+        "total_cases": len(cases),
+    }
+
+
+def get_first_call_resolution(counts: dict[str, int]) -> float:
+    return (
+        counts["closed_case_count"] - counts["escalated_case_count"] - counts["child_case_count"]
+    ) / counts["total_cases"]
+
+
+def sweep_child_case_threshold(
+    counts: dict[str, int], subtotals: Subtotals, child_case_thresholds: Sequence[int]
+) -> dict[int, float]:
+    """Returns the FCR at each child case threshold, with the other counts as in `counts`"""
+
+    return {
+        child_case_threshold: get_first_call_resolution(
+            {**counts, "child_case_count": child_case_count}
+        )
+        for child_case_threshold, child_case_count in zip(
+            child_case_thresholds, subtotals.sweep(child_case_thresholds)
+        )
+    }
+
+
+@instrumented("first_call_resolution")
 def main(
     report_date,
     fcr_reopened_file,
@@ -100,45 +525,109 @@ def main(
     fcr_parent_file,
     child_case_threshold: int,
     child_case_count_override: Optional[int] = None,
+    case_store: Optional["CaseStore"] = None,
 ) -> dict[str, int]:
-
-    cases = get_cases(
-        report_date,
-        fcr_reopened_file,
-        "Edit Date",
-        is_reopened=True,
-        file_display_name="Re-opened Report",
-    )
-
-    cases.extend(
-        get_cases(
+    """
+    Calculates the FCR counts for `report_date`
+
+    With a `case_store`, the uploads are added to it and the counts cover every upload it
+    holds, rather than just these ones
+    """
+
+    counts: Optional[dict[str, int]]
+    if case_store is not None:
+        counts = count_stored_cases(
+            case_store, report_date, report_date, fcr_reopened_file, fcr_closed_file
+        ).get(report_date)
+        subtotals = get_subtotals(fcr_parent_file) if child_case_count_override is None else None
+
+    else:
+        reopened_cases, closed_cases, subtotals = load_fcr_reports(
+            report_date,
             report_date,
+            fcr_reopened_file,
             fcr_closed_file,
-            "Date/Time Opened",
-            is_reopened=False,
-            file_display_name="Closed Report",
+            fcr_parent_file,
+            load_parent=child_case_count_override is None,
         )
-    )
 
-    cases = keep_unique_case_by_newest_datetime(cases)
+        with stage("dedupe_cases") as current:
+            cases = keep_unique_case_by_newest_datetime(reopened_cases + closed_cases)
+            current.rows = len(reopened_cases) + len(closed_cases)
 
-    if not cases:
+        counts = get_case_counts(cases, 0) if cases else None
+
+    if not counts:
         raise ValueError("No cases found for the given report date")
 
     child_case_count = (
         child_case_count_override
         if child_case_count_override is not None
-        else get_child_case_count(
+        else count_child_cases(subtotals, child_case_threshold)
+    )
+
+    return {**counts, "child_case_count": child_case_count}
+
+
+@instrumented("first_call_resolution_range")
+def main_range(
+    start_date: date,
+    end_date: date,
+    fcr_reopened_file,
+    fcr_closed_file,
+    fcr_parent_file,
+    child_case_threshold: int,
+    child_case_count_override: Optional[int] = None,
+    case_store: Optional["CaseStore"] = None,
+) -> dict[str, Any]:
+    """
+    Calculates the FCR counts for every day from `start_date` to `end_date` (inclusive),
+    reading each report only once
+
+    Returns the per-day counts, keyed by date, and the total over the range. Cases are
+    de-duplicated per day, so each day matches what `main` would return for that date.
+    The parent cases report isn't dated, so child cases only count towards the range total.
+    With a `case_store`, the counts cover every upload it holds, as with `main`.
+    """
+
+    if case_store is not None:
+        days = count_stored_cases(
+            case_store, start_date, end_date, fcr_reopened_file, fcr_closed_file
+        )
+        subtotals = get_subtotals(fcr_parent_file) if child_case_count_override is None else None
+
+    else:
+        reopened_cases, closed_cases, subtotals = load_fcr_reports(
+            start_date,
+            end_date,
+            fcr_reopened_file,
+            fcr_closed_file,
             fcr_parent_file,
-            child_case_threshold,
+            load_parent=child_case_count_override is None,
         )
+
+        cases = reopened_cases + closed_cases
+        with stage("count_days") as current:
+            cases_by_date: dict[date, List[Case]] = {}
+            for case in cases:
+                cases_by_date.setdefault(case.datetime.date(), []).append(case)
+
+            days = {
+                day: get_case_counts(keep_unique_case_by_newest_datetime(day_cases), 0)
+                for day, day_cases in sorted(cases_by_date.items())
+            }
+            current.rows = len(cases)
+
+    if not days:
+        raise ValueError("No cases found for the given report dates")
+
+    child_case_count = (
+        child_case_count_override
+        if child_case_count_override is not None
+        else count_child_cases(subtotals, child_case_threshold)
     )
 
-    closed_cases, escalated_cases = get_closed_and_escalated_cases(cases)
+    total = {key: sum(counts[key] for counts in days.values()) for key in COUNT_KEYS}
+    total["child_case_count"] = child_case_count
 
-    return {
-        "closed_case_count": len(closed_cases),
-        "escalated_case_count": len(escalated_cases),
-        "child_case_count": child_case_count,
-        "total_cases": len(cases),
-    }
+    return {"days": days, "total": total}
@@ -0,0 +1,187 @@
+import os
+import sqlite3
+from contextlib import closing
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Any, Optional
+
+from scripts.cache import hash_upload
+from scripts.instrumentation import stage
+
+if TYPE_CHECKING:
+    from scripts.calculate_first_call_resolution import Case
+
+# an SQLite file that uploaded FCR cases are accumulated in; unset to always re-parse uploads
+CASE_STORE_FILE = os.environ.get("REPORTING_TOOLS_CASE_STORE")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    day TEXT NOT NULL,
+    case_number TEXT NOT NULL,
+    datetime TEXT NOT NULL,
+    case_owner TEXT,
+    status TEXT,
+    is_open INTEGER NOT NULL,
+    is_closed INTEGER NOT NULL,
+    was_escalated INTEGER NOT NULL,
+    is_reopened INTEGER NOT NULL,
+    upload INTEGER NOT NULL,
+    PRIMARY KEY (day, case_number)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS uploads (
+    id INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL UNIQUE,
+    file_display_name TEXT NOT NULL,
+    cases INTEGER NOT NULL,
+    ingested_at TEXT NOT NULL
+);
+"""
+
+# keeps the newest case for each day and case number, like keep_unique_case_by_newest_datetime:
+# on a tie the re-opened case wins, since that report comes first, then the later upload, since
+# a cumulative export's rows are updated in place (e.g. a case escalated after it was opened
+# keeps its opened time), and within an upload whichever row came first
+UPSERT_CASE = """
+INSERT INTO cases VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (day, case_number) DO UPDATE SET
+    datetime = excluded.datetime,
+    case_owner = excluded.case_owner,
+    status = excluded.status,
+    is_open = excluded.is_open,
+    is_closed = excluded.is_closed,
+    was_escalated = excluded.was_escalated,
+    is_reopened = excluded.is_reopened,
+    upload = excluded.upload
+WHERE excluded.datetime > cases.datetime
+    OR (
+        excluded.datetime = cases.datetime
+        AND (
+            excluded.is_reopened > cases.is_reopened
+            OR (excluded.is_reopened = cases.is_reopened AND excluded.upload > cases.upload)
+        )
+    )
+"""
+
+COUNT_CASES = """
+SELECT
+    day,
+    SUM(NOT is_reopened),
+    SUM(NOT is_reopened AND was_escalated),
+    COUNT(*)
+FROM cases
+WHERE day BETWEEN ? AND ?
+GROUP BY day
+ORDER BY day
+"""
+
+
+def _case_values(case: "Case", upload: int) -> tuple:
+    # fixed-width timestamps, so that they compare correctly as text
+    timestamp = case.datetime.isoformat(sep=" ", timespec="microseconds")[:26]
+    return (
+        timestamp[:10],
+        str(case.case_number),
+        timestamp,
+        case.case_owner,
+        case.status,
+        case.is_open,
+        case.is_closed,
+        case.was_escalated,
+        case.is_reopened,
+        upload,
+    )
+
+
+class CaseStore:
+    """
+    A persistent store of the FCR cases from every upload, keeping the newest case per day
+    and case number
+
+    Daily exports overlap heavily, so each upload is ingested once (uploads already seen are
+    recognized by their contents) and FCR counts become an indexed query over the store
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # a connection per call, since the app serves each session from its own thread
+        return sqlite3.connect(self.path, timeout=30)
+
+    def ingest(
+        self, report_file: Any, report_date_column: str, is_reopened: bool, file_display_name: str
+    ) -> Optional[int]:
+        """
+        Adds the report's cases to the store, returning how many were read, or None if this
+        upload was already ingested
+        """
+
+        # imported here since the app opens the store on startup, before it needs the reader
+        from scripts.calculate_first_call_resolution import read_cases
+
+        digest = hash_upload(report_file)
+        with closing(self._connect()) as conn:
+            # skips parsing uploads already seen; the insert below is what guards against races
+            if conn.execute("SELECT 1 FROM uploads WHERE digest = ?", (digest,)).fetchone():
+                return None
+
+            cases = read_cases(
+                date.min,
+                report_file,
+                report_date_column,
+                is_reopened,
+                file_display_name,
+                end_date=date.max,
+            )
+
+            # claiming the upload takes the write lock, so if another ingest of the same file
+            # got there first nothing is written, and its cases and upload row commit together
+            with stage("ingest_cases", file=file_display_name) as current, conn:
+                claim = conn.execute(
+                    "INSERT OR IGNORE INTO uploads (digest, file_display_name, cases, ingested_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    (digest, file_display_name, len(cases), datetime.now().isoformat()),
+                )
+                if not claim.rowcount:
+                    return None
+
+                # uploads are never deleted, so their ids order them as they were ingested
+                upload = claim.lastrowid
+                conn.executemany(UPSERT_CASE, (_case_values(case, upload) for case in cases))
+                current.rows = len(cases)
+
+        return len(cases)
+
+    def count_cases(self, start_date: date, end_date: date) -> dict[date, dict[str, int]]:
+        """
+        Returns the FCR counts of each day with cases from `start_date` to `end_date`
+        (inclusive); the parent cases report isn't dated, so child cases aren't included
+        """
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                COUNT_CASES, (start_date.isoformat(), end_date.isoformat())
+            ).fetchall()
+
+        return {
+            date.fromisoformat(day): {
+                "closed_case_count": closed_case_count,
+                "escalated_case_count": escalated_case_count,
+                "child_case_count": 0,
+                "total_cases": total_cases,
+            }
+            for day, closed_case_count, escalated_case_count, total_cases in rows
+        }
+
+    def stats(self) -> dict[str, int]:
+        with closing(self._connect()) as conn:
+            return {
+                "cases": conn.execute("SELECT COUNT(*) FROM cases").fetchone()[0],
+                "uploads": conn.execute("SELECT COUNT(*) FROM uploads").fetchone()[0],
+            }
+
+
+def get_case_store(path: Optional[str] = CASE_STORE_FILE) -> Optional[CaseStore]:
+    return CaseStore(path) if path else None
@@ -0,0 +1,95 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+from static import follow_up_and_weight_map
+
+# an external JSON or YAML file that replaces the built-in follow-up and weight map
+RULES_FILE = os.environ.get("REPORTING_TOOLS_RULES_FILE")
+
+
+class Rule(NamedTuple):
+    follow_up: int | float
+    weight: int | float
+
+
+class RuleTable:
+    """
+    The follow-up and weight rules for each case status, compiled for fast lookups
+
+    Lookups are cached per raw pivot table label, so each distinct label is only
+    normalized and matched once
+    """
+
+    def __init__(self, rules: dict[str, dict[str, Any]]) -> None:
+        self.rules: dict[str, Rule] = {}
+        for status, rule in rules.items():
+            try:
+                follow_up = rule["follow-up"]
+                weight = rule["weight"]
+                # case ages are divided by the follow-up and multiplied by the weight
+                valid = follow_up > 0 and isinstance(weight, (int, float))
+
+            except (KeyError, TypeError):
+                valid = False
+
+            if not valid:
+                raise ValueError(f'Invalid follow-up and weight rule for "{status}"')
+
+            self.rules[status.strip().lower()] = Rule(follow_up, weight)
+
+        self._labels: dict[Any, Optional[Rule]] = {}
+
+    def lookup(self, label: Any) -> Optional[Rule]:
+        """Returns the rule for a pivot table status label, or None if it's not mapped"""
+
+        if label not in self._labels:
+            self._labels[label] = (
+                self.rules.get(label.strip().lower()) if isinstance(label, str) else None
+            )
+
+        return self._labels[label]
+
+
+def read_rules_file(path: Path) -> dict[str, dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        if path.suffix.lower() in (".yml", ".yaml"):
+            try:
+                import yaml  # pylint: disable=import-outside-toplevel
+
+            except ImportError as e:
+                raise ValueError("PyYAML is required to read YAML rules files") from e
+
+            return yaml.safe_load(f)
+
+        return json.load(f)
+
+
+_lock = threading.Lock()
+_rule_tables: dict[Optional[Path], tuple[Optional[float], RuleTable]] = {}
+
+
+def load_rule_table(rules_file: Optional[str | Path] = RULES_FILE) -> RuleTable:
+    """
+    Loads the rule table once per process, from `rules_file` if given or else from the
+    built-in map; a rules file is reloaded whenever its modified time changes
+    """
+
+    path = Path(rules_file) if rules_file else None
+    try:
+        mtime = path.stat().st_mtime if path else None
+
+    except FileNotFoundError as e:
+        raise ValueError(f"Follow-up and weight rules file not found: {path}") from e
+
+    with _lock:
+        cached = _rule_tables.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        rules = read_rules_file(path) if path else follow_up_and_weight_map.get_map()
+        rule_table = RuleTable(rules)
+        _rule_tables[path] = (mtime, rule_table)
+        return rule_table
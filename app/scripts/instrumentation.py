@@ -0,0 +1,237 @@
+"""
+Lightweight per-stage timing and memory instrumentation
+
+Wrap a unit of work in `stage` (or decorate it with `instrumented`) to record its wall time,
+rows processed, and memory use. Recording is off unless REPORTING_TOOLS_INSTRUMENT is set, in
+which case stages cost a tracemalloc snapshot each; otherwise they're close to free.
+
+tracemalloc traces the whole process, so while jobs run concurrently each one's memory figures
+include the others' allocations; their records are marked `overlapped`.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None  # type: ignore[assignment]
+
+T = TypeVar("T")
+
+ENABLED = os.environ.get("REPORTING_TOOLS_INSTRUMENT", "").lower() in ("1", "true", "yes", "on")
+
+# a JSON lines file that every stage record is appended to, for monitoring
+LOG_FILE = os.environ.get("REPORTING_TOOLS_INSTRUMENT_LOG")
+
+# the most recent stage records, newest last
+stage_history: deque[dict[str, Any]] = deque(maxlen=500)
+
+_collector: ContextVar[Optional[list[dict[str, Any]]]] = ContextVar("collector", default=None)
+_current: ContextVar[Optional["Stage"]] = ContextVar("current_stage", default=None)
+_log_lock = threading.Lock()
+_tracing_lock = threading.Lock()
+_tracing_depth = 0
+_started_tracing = False
+_active_roots: set["Stage"] = set()  # outermost stages running, e.g. one per job
+
+
+class Stage:
+    """A stage being measured; set `rows` to the number of rows it processed"""
+
+    def __init__(self, name: str, fields: dict[str, Any]) -> None:
+        self.name = name
+        self.fields = fields
+        self.rows: Optional[int] = None
+        self.peak_bytes = 0  # highest traced memory seen by this stage and its children
+        self.root = self  # the outermost stage this one is nested in
+        self.overlapped = False  # set on roots that ran alongside another root
+
+
+def _max_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _start_tracing() -> None:
+    global _tracing_depth, _started_tracing
+
+    with _tracing_lock:
+        if not _tracing_depth and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+
+        _tracing_depth += 1
+
+
+def _stop_tracing() -> None:
+    global _tracing_depth, _started_tracing
+
+    # tracing slows allocations down, so only leave it on while a stage is running
+    with _tracing_lock:
+        _tracing_depth -= 1
+        if not _tracing_depth and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+def _enter_root(root: Stage) -> None:
+    with _tracing_lock:
+        # traced memory is process-wide, so neither stage's memory figures are its own
+        if _active_roots:
+            root.overlapped = True
+            for other in _active_roots:
+                other.overlapped = True
+
+        _active_roots.add(root)
+
+
+def _exit_root(root: Stage) -> None:
+    with _tracing_lock:
+        _active_roots.discard(root)
+
+
+def record(entry: dict[str, Any]) -> None:
+    """Adds a stage record to the history, the active collector, and the log file"""
+
+    stage_history.append(entry)
+
+    records = _collector.get()
+    if records is not None:
+        records.append(entry)
+
+    if LOG_FILE:
+        with _log_lock, open(LOG_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, default=str) + "\n")
+
+
+@contextmanager
+def stage(name: str, **fields: Any) -> Iterator[Stage]:
+    """
+    Measures the wrapped block as a stage called `name`, with any `fields` added to its record
+
+    Peak memory is the most traced (Python-allocated) memory above what was allocated when
+    the stage started, including any nested stages; max RSS is the process's high-water mark.
+    Both are process-wide, so a stage that ran alongside another job's stages is recorded as
+    `overlapped`, and its peak counts the other job's allocations too (or misses some of its
+    own, when the other job resets the peak)
+    """
+
+    current = Stage(name, fields)
+    if not ENABLED:
+        yield current
+        return
+
+    _start_tracing()
+    parent = _current.get()
+    if parent is not None:
+        current.root = parent.root
+
+    else:
+        _enter_root(current)
+
+    token = _current.set(current)
+
+    start_bytes, parent_peak = tracemalloc.get_traced_memory()
+    if parent is not None:
+        parent.peak_bytes = max(parent.peak_bytes, parent_peak)
+
+    tracemalloc.reset_peak()
+    started_at = datetime.now(timezone.utc)
+    start = time.perf_counter()
+    error: Optional[str] = None
+    try:
+        yield current
+
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+
+    finally:
+        seconds = time.perf_counter() - start
+        current.peak_bytes = max(current.peak_bytes, tracemalloc.get_traced_memory()[1])
+        if parent is not None:
+            # let the parent see this stage's peak, since resetting it hid it from the parent
+            parent.peak_bytes = max(parent.peak_bytes, current.peak_bytes)
+
+        _current.reset(token)
+        if parent is None:
+            _exit_root(current)
+
+        _stop_tracing()
+
+        record(
+            {
+                "stage": name,
+                **fields,
+                "parent": parent.name if parent is not None else None,
+                "started_at": started_at.isoformat(timespec="milliseconds"),
+                "seconds": round(seconds, 6),
+                "rows": current.rows,
+                "rows_per_second": (
+                    round(current.rows / seconds) if current.rows and seconds else None
+                ),
+                "process_peak_traced_mb": round(
+                    max(current.peak_bytes - start_bytes, 0) / 1024**2, 2
+                ),
+                "max_rss_mb": _max_rss_mb(),
+                "overlapped": current.root.overlapped,
+                "error": error,
+            }
+        )
+
+
+def instrumented(
+    name: Optional[str] = None, rows: Optional[Callable[[Any], int]] = None
+) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Decorates a function to run as a stage, counting its rows with `rows(result)` if given"""
+
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        stage_name = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            if not ENABLED:
+                return func(*args, **kwargs)
+
+            with stage(stage_name) as current:
+                result = func(*args, **kwargs)
+                if rows is not None:
+                    current.rows = rows(result)
+
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def collect() -> Iterator[list[dict[str, Any]]]:
+    """Collects the records of every stage run within the block, e.g. for one app rerun"""
+
+    records: list[dict[str, Any]] = []
+    token = _collector.set(records)
+    try:
+        yield records
+
+    finally:
+        _collector.reset(token)
+
+
+def to_jsonl(records: list[dict[str, Any]]) -> str:
+    return "".join(json.dumps(entry, default=str) + "\n" for entry in records)
@@ -0,0 +1,140 @@
+"""
+A bounded pool of background jobs for processing uploads, with progress reporting and
+cancellation
+
+Processing code reports progress by wrapping its row loops in `track`, which hands the rows
+straight back when it isn't running as a job, so the scripts work the same outside the app
+"""
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextvars import ContextVar
+from typing import Any, Callable, Generic, Iterable, Iterator, Optional, TypeVar
+
+from scripts.instrumentation import collect
+
+T = TypeVar("T")
+
+# uploads processed at once across every session; the rest wait their turn in the queue
+JOB_WORKERS = int(os.environ.get("REPORTING_TOOLS_JOB_WORKERS", min(4, os.cpu_count() or 1)))
+
+# rows between progress updates, which are also when a cancelled job notices and stops
+PROGRESS_EVERY = 1_000
+
+_current_job: ContextVar[Optional["Job"]] = ContextVar("current_job", default=None)
+
+
+class JobCancelled(Exception):
+    """Raised within a job's processing once the job has been cancelled"""
+
+
+class Job(Generic[T]):
+    """A handle on a submitted job, for following its progress and collecting its result"""
+
+    def __init__(self, description: str) -> None:
+        self.description = description
+        self.message = description
+        self.fraction = 0.0  # of the current step, e.g. reading one report
+        self.stages: list[dict[str, Any]] = []  # instrumentation records, once finished
+        self.future: Future[T] = Future()
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """Stops the job at its next progress update, or before it starts if still queued"""
+
+        self._cancelled.set()
+        self.future.cancel()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Waits up to `timeout` seconds for the job to finish, returning whether it has"""
+
+        wait([self.future], timeout)
+        return self.future.done()
+
+    def result(self) -> T:
+        """Returns the job's result, raising whatever it raised"""
+
+        return self.future.result()
+
+    def report(self, message: str, done: int, total: Optional[int] = None) -> None:
+        """Updates the job's progress, raising `JobCancelled` if it has been cancelled"""
+
+        if self.cancelled:
+            raise JobCancelled(self.description)
+
+        if total:
+            self.message = f"{message}: {done:,} of {total:,} rows"
+            self.fraction = min(done / total, 1.0)
+
+        else:
+            self.message = f"{message}: {done:,} rows"
+
+    def track(self, rows: Iterable[T], message: str, total: Optional[int]) -> Iterator[T]:
+        done = 0
+        self.report(message, done, total)
+        for done, row in enumerate(rows, 1):
+            if not done % PROGRESS_EVERY:
+                self.report(message, done, total)
+
+            yield row
+
+        self.report(message, done, done)
+
+
+def track(rows: Iterable[T], message: str, total: Optional[int] = None) -> Iterable[T]:
+    """
+    Reports progress through `rows` (out of `total`, if known) to the job running them;
+    outside of a job the rows are returned untouched
+    """
+
+    job = _current_job.get()
+    if job is None:
+        return rows
+
+    return job.track(rows, message, total)
+
+
+class JobPool:
+    """A fixed number of worker threads that run jobs in the order they're submitted"""
+
+    def __init__(self, max_workers: int) -> None:
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def submit(
+        self, description: str, func: Callable[..., T], *args: Any, **kwargs: Any
+    ) -> Job[T]:
+        job: Job[T] = Job(description)
+        job.future = self._get_executor().submit(self._run, job, func, *args, **kwargs)
+        return job
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # started on first use, so importing the module doesn't start any threads
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="job")
+
+            return self._executor
+
+    @staticmethod
+    def _run(job: Job[T], func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if job.cancelled:
+            raise JobCancelled(job.description)
+
+        token = _current_job.set(job)
+        try:
+            with collect() as stages:
+                job.stages = stages
+                return func(*args, **kwargs)
+
+        finally:
+            _current_job.reset(token)
+
+
+job_pool = JobPool(JOB_WORKERS)
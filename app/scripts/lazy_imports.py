@@ -0,0 +1,71 @@
+"""
+Deferred imports of the heavy dependencies, so starting the app doesn't wait on them
+
+pandas, openpyxl, and the report scripts take most of a second to import, which every new
+app process would otherwise pay before its first page renders. Modules reached through a
+`LazyModule` are imported on first use instead, and `start_warmup` can preload them in the
+background once the page is up.
+"""
+
+import importlib
+import os
+import threading
+from types import ModuleType
+from typing import Any, Optional
+
+# preload the heavy dependencies in the background after the first render
+WARMUP = os.environ.get("REPORTING_TOOLS_WARMUP", "").lower() in ("1", "true", "yes", "on")
+
+# imported by the warmup, heaviest first; the report readers pandas imports on demand are
+# included, and any that aren't installed are skipped
+WARMUP_MODULES = [
+    "pandas",
+    "openpyxl",
+    "scripts.calculate_first_call_resolution",
+    "scripts.build_case_report",
+    "xlrd",
+    "lxml.html",
+    "pandas.io.html",
+    "pandas.io.excel",
+]
+
+_warmup_thread: Optional[threading.Thread] = None
+_warmup_lock = threading.Lock()
+
+
+class LazyModule:
+    """Stands in for a module, importing it the first time one of its attributes is used"""
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self._module: Optional[ModuleType] = None
+
+    def __getattr__(self, attribute: str) -> Any:
+        # the import system's locks make this safe to race with other imports of the module
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+
+        return getattr(self._module, attribute)
+
+    def __repr__(self) -> str:
+        return f"<lazy module {self._name!r}>"
+
+
+def _warm_up() -> None:
+    for name in WARMUP_MODULES:
+        try:
+            importlib.import_module(name)
+
+        except ImportError:
+            continue
+
+
+def start_warmup() -> None:
+    """Starts importing `WARMUP_MODULES` on a background thread, once per process"""
+
+    global _warmup_thread
+
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=_warm_up, name="warmup", daemon=True)
+            _warmup_thread.start()
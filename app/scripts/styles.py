@@ -0,0 +1,45 @@
+from typing import Callable, Hashable, TypeVar
+
+from openpyxl.styles import Alignment
+from openpyxl.styles.borders import Border, Side
+from openpyxl.styles.fills import PatternFill
+
+T = TypeVar("T")
+
+
+class StyleRegistry:
+    """
+    Interns openpyxl style objects by value, so each distinct style is only created once
+    no matter how many cells ask for it
+
+    Interned styles are shared between cells and must not be modified
+    """
+
+    def __init__(self) -> None:
+        self._styles: dict[Hashable, object] = {}
+
+    def _intern(self, key: Hashable, factory: Callable[[], T]) -> T:
+        if key not in self._styles:
+            self._styles[key] = factory()
+
+        return self._styles[key]  # type: ignore
+
+    def solid_fill(self, color: str) -> PatternFill:
+        return self._intern(
+            ("fill", color),
+            lambda: PatternFill(start_color=color, end_color=color, fill_type="solid"),
+        )
+
+    def box_border(self, style: str) -> Border:
+        def factory() -> Border:
+            side = Side(style=style)
+            return Border(left=side, right=side, top=side, bottom=side)
+
+        return self._intern(("border", style), factory)
+
+    def alignment(self, horizontal: str) -> Alignment:
+        return self._intern(("alignment", horizontal), lambda: Alignment(horizontal=horizontal))
+
+
+# shared by every report formatted in this process
+style_registry = StyleRegistry()
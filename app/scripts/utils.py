@@ -1,60 +1,494 @@
-from tempfile import NamedTemporaryFile
-from typing import Any
+import logging
+import time
+import warnings
+from collections import deque
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Optional
 
 import openpyxl
-import pandas as pd
+from dateutil.parser import parse as parse_date
 from openpyxl import Workbook
+from openpyxl.worksheet._read_only import ReadOnlyWorksheet
+from openpyxl.worksheet.worksheet import Worksheet
 
+from scripts.instrumentation import instrumented, stage
+from scripts.lazy_imports import LazyModule
 
-def format_percent(val: float | int) -> str:
-    return f"{round(val * 100, 2)}%"
+if TYPE_CHECKING:
+    import pandas as pd
 
+else:
+    # only the xls, html, and csv readers need pandas, so xlsx reports don't wait on it
+    pd = LazyModule("pandas")
 
-def open_workbook(report_file: Any, file_display_name: str) -> Workbook:
-    # XLSX
-    try:
-        report_file.seek(0)
-        return openpyxl.load_workbook(report_file)
+logger = logging.getLogger(__name__)
 
-    except Exception:
-        pass
+# the first bytes of each supported file format
+ZIP_MAGIC = b"PK\x03\x04"
+OLE2_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+HTML_MARKERS = (b"<!doctype html", b"<html", b"<table", b"<head", b"<body", b"<meta")
 
-    # HTML
-    try:
-        report_file.seek(0)
-        df = pd.read_html(report_file)[0]
+SNIFF_SIZE = 2048
 
-        with NamedTemporaryFile(delete=False) as f:
-            df.to_excel(f, engine="openpyxl")
-            return openpyxl.load_workbook(f)  # type: ignore
+# rows per chunk when streaming CSV reports
+CSV_CHUNK_ROWS = 10_000
 
-    except Exception:
-        pass
+# date formats found in Salesforce exports, most common first
+DATETIME_FORMATS = [
+    "%m/%d/%Y %I:%M %p",
+    "%m/%d/%Y, %I:%M %p",
+    "%m/%d/%y %I:%M %p",
+    "%m/%d/%Y %H:%M",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%dT%H:%M:%S.%f%z",
+    "%Y-%m-%dT%H:%M:%S%z",
+    "%Y-%m-%d",
+]
 
-    # XLS
-    try:
-        report_file.seek(0)
-        df = pd.read_excel(report_file, engine="xlrd")
+# number of strings used to infer the format of a date column
+DATETIME_SAMPLE_SIZE = 100
 
-        with NamedTemporaryFile(delete=False) as f:
-            df.to_excel(f, engine="openpyxl")
-            return openpyxl.load_workbook(f)  # type: ignore
+# the most recent report loads, newest last; used for diagnostics
+open_history: deque[dict[str, Any]] = deque(maxlen=100)
+
+
+def infer_datetime_format(samples: Iterable[str]) -> Optional[str]:
+    """Returns the first known date format that parses every sample, if any"""
+
+    samples = [sample.strip() for sample in samples]
+    if not samples:
+        return None
+
+    for datetime_format in DATETIME_FORMATS:
+        try:
+            for sample in samples:
+                datetime.strptime(sample, datetime_format)
+
+        except ValueError:
+            continue
+
+        return datetime_format
+
+    return None
 
-    except Exception:
-        pass
 
-    # CSV
+def sorted_block(dates: "pd.Series", start: datetime, end: datetime) -> Optional[slice]:
+    """
+    Returns the positions of the dates between `start` and `end` (inclusive) if the dates are
+    sorted in either direction, or None if they aren't sorted and have to be scanned
+    """
+
+    if not pd.api.types.is_datetime64_any_dtype(dates) or dates.isna().any():
+        return None
+
     try:
-        report_file.seek(0)
-        df = pd.read_csv(report_file)
+        if dates.is_monotonic_increasing:
+            return slice(
+                int(dates.searchsorted(start, "left")), int(dates.searchsorted(end, "right"))
+            )
 
-        with NamedTemporaryFile(delete=False) as f:
-            df.to_excel(f, engine="openpyxl")
-            return openpyxl.load_workbook(f)  # type: ignore
+        if dates.is_monotonic_decreasing:
+            reverse = dates.iloc[::-1]
+            return slice(
+                len(dates) - int(reverse.searchsorted(end, "right")),
+                len(dates) - int(reverse.searchsorted(start, "left")),
+            )
 
-    except Exception:
+    # e.g. bounds outside the range pandas supports, or timezone-aware dates
+    except (TypeError, ValueError, OverflowError):
         pass
 
-    raise ValueError(
-        f"Unable to open {file_display_name} file; is it in the right format?"
+    return None
+
+
+def parse_datetime_column(values: "pd.Series") -> "pd.Series":
+    """
+    Converts a column of datetimes and/or date strings to datetimes in bulk
+
+    The format is inferred from a sample of the strings and applied to the whole column at
+    once; strings that don't match it are parsed one by one with dateutil
+    """
+
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+
+    values = values.astype(object)
+    is_string = values.map(lambda v: isinstance(v, str)).astype(bool)
+    if not is_string.any():
+        return pd.to_datetime(values)
+
+    strings = values[is_string].str.strip()
+    datetime_format = infer_datetime_format(strings.iloc[:DATETIME_SAMPLE_SIZE])
+    with warnings.catch_warnings():
+        # pandas warns when it has to infer a format itself; dateutil backs it up regardless
+        warnings.simplefilter("ignore", UserWarning)
+        parsed = pd.to_datetime(strings, format=datetime_format, errors="coerce")
+
+    unparsed = parsed.isna()
+    if unparsed.any():
+        parsed[unparsed] = pd.to_datetime(strings[unparsed].map(parse_date))
+
+    # skip the round trip through objects when the column is all strings, as it usually is
+    if is_string.all():
+        return parsed
+
+    values[is_string] = parsed
+    return pd.to_datetime(values)
+
+
+class DatetimeParser:
+    """
+    Parses date strings one at a time, using the format of the first string it sees and
+    falling back to dateutil for any string that doesn't match it
+    """
+
+    def __init__(self) -> None:
+        self.datetime_format: Optional[str] = None
+        self.inferred = False
+
+    def __call__(self, value: str) -> datetime:
+        value = value.strip()
+        if not self.inferred:
+            self.datetime_format = infer_datetime_format([value])
+            self.inferred = True
+
+        if self.datetime_format:
+            try:
+                return datetime.strptime(value, self.datetime_format)
+
+            except ValueError:
+                pass
+
+        return parse_date(value)
+
+
+class ReportTable:
+    """A read-only, row-oriented view over a report, independent of its file format"""
+
+    # columns converted to datetimes in bulk, for the tables that are backed by DataFrames
+    date_columns: tuple[str, ...] = ()
+
+    def rows(self) -> Iterator[tuple[Any, ...]]:
+        """Yields every row (including the header row) as a tuple of cell values"""
+
+        raise NotImplementedError
+
+    def rows_between(
+        self, column: str, start: datetime, end: datetime
+    ) -> Iterator[tuple[Any, ...]]:
+        """
+        Yields the header row, then at least every row whose `column` is between `start` and
+        `end` (inclusive)
+
+        Tables that can tell the column is sorted skip straight to those rows; the rest yield
+        every row, so callers must still filter them
+        """
+
+        return self.rows()
+
+    def row_count(self) -> Optional[int]:
+        """Returns the number of rows (including the header row), if known without reading them"""
+
+        return None
+
+    def to_frame(self) -> "pd.DataFrame":
+        """Loads the whole table into a DataFrame, using the first row as the column names"""
+
+        rows = self.rows()
+        headers = next(rows, ())
+        return self._parse_dates(pd.DataFrame.from_records(list(rows), columns=list(headers)))
+
+    def close(self) -> None:
+        """Releases any file handles held by the table"""
+
+    def _parse_dates(self, df: "pd.DataFrame") -> "pd.DataFrame":
+        columns = [column for column in self.date_columns if column in df.columns]
+        if not columns:
+            return df
+
+        df = df.copy()
+        for column in columns:
+            df[column] = parse_datetime_column(df[column])
+
+        return df
+
+    def __enter__(self) -> "ReportTable":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+class WorksheetTable(ReportTable):
+    """
+    A report table backed by an openpyxl worksheet
+
+    Read-only worksheets are streamed row by row, so memory use doesn't grow with the sheet.
+    `rows_between` always yields every row: rows can only be reached by parsing the sheet's
+    XML from the start, and openpyxl parses every cell even when asked for one column, so
+    checking whether the date column is sorted would cost nearly as much as a full scan
+    """
+
+    def __init__(self, ws: Worksheet | ReadOnlyWorksheet) -> None:
+        self.ws = ws
+
+        # rows are only padded to full width when the sheet declares its dimensions
+        if isinstance(ws, ReadOnlyWorksheet) and ws.max_column is None:
+            ws.calculate_dimension(force=True)
+
+    def rows(self) -> Iterator[tuple[Any, ...]]:
+        return self.ws.iter_rows(values_only=True)
+
+    def row_count(self) -> Optional[int]:
+        return self.ws.max_row
+
+    def close(self) -> None:
+        self.ws.parent.close()
+
+
+class DataFrameTable(ReportTable):
+    """
+    A report table backed by a DataFrame
+
+    Rows are laid out the same way `DataFrame.to_excel` would write them (index in the first
+    column, blank cells instead of NaN) so column offsets match those of converted workbooks
+    """
+
+    def __init__(self, df: "pd.DataFrame") -> None:
+        self.df = df
+
+    def rows(self) -> Iterator[tuple[Any, ...]]:
+        df = self._parse_dates(self.df)
+        yield (None, *df.columns)
+
+        values = df.astype(object).where(df.notna(), None)
+        yield from values.itertuples(name=None)
+
+    def rows_between(
+        self, column: str, start: datetime, end: datetime
+    ) -> Iterator[tuple[Any, ...]]:
+        df = self._parse_dates(self.df)
+        block = sorted_block(df[column], start, end) if column in df.columns else None
+        if block is None:
+            return DataFrameTable(df).rows()
+
+        return DataFrameTable(df.iloc[block]).rows()
+
+    def row_count(self) -> Optional[int]:
+        return len(self.df) + 1
+
+    def to_frame(self) -> "pd.DataFrame":
+        return self._parse_dates(self.df)
+
+
+class CsvTable(ReportTable):
+    """A report table that streams a CSV file in chunks, laid out like a `DataFrameTable`"""
+
+    def __init__(self, report_file: Any, chunk_rows: int = CSV_CHUNK_ROWS) -> None:
+        self.report_file = report_file
+        self.chunk_rows = chunk_rows
+
+        # the header is parsed eagerly so malformed files fail here rather than mid-stream
+        self.reader = pd.read_csv(report_file, chunksize=chunk_rows)
+
+    def rows(self) -> Iterator[tuple[Any, ...]]:
+        yielded_header = False
+        for chunk in self.reader:
+            chunk_table = DataFrameTable(self._parse_dates(chunk)).rows()
+            header = next(chunk_table)
+            if not yielded_header:
+                yield header
+                yielded_header = True
+
+            yield from chunk_table
+
+    def rows_between(
+        self, column: str, start: datetime, end: datetime
+    ) -> Iterator[tuple[Any, ...]]:
+        # probe the date column on its own, which is much cheaper to parse than every column
+        try:
+            self.report_file.seek(0)
+            dates = parse_datetime_column(pd.read_csv(self.report_file, usecols=[column])[column])
+            block = sorted_block(dates, start, end)
+
+            if block is not None:
+                self.report_file.seek(0)
+                df = self._parse_dates(
+                    pd.read_csv(
+                        self.report_file,
+                        skiprows=range(1, block.start + 1),
+                        nrows=block.stop - block.start,
+                    )
+                )
+
+                # quoted line breaks would throw the row positions off, so make sure they line up
+                if (
+                    df[column]
+                    .reset_index(drop=True)
+                    .equals(dates.iloc[block].reset_index(drop=True))
+                ):
+                    return DataFrameTable(df).rows()
+
+        except (ValueError, TypeError, KeyError):
+            pass
+
+        self.reader.close()
+        self.report_file.seek(0)
+        self.reader = pd.read_csv(self.report_file, chunksize=self.chunk_rows)
+        return self.rows()
+
+    def to_frame(self) -> "pd.DataFrame":
+        return self._parse_dates(pd.concat(self.reader, ignore_index=True))
+
+    def close(self) -> None:
+        self.reader.close()
+
+
+def format_percent(val: float | int) -> str:
+    return f"{round(val * 100, 2)}%"
+
+
+def detect_format(report_file: Any) -> str:
+    """Sniffs the first bytes of the file and returns one of "xlsx", "xls", "html", or "csv" """
+
+    report_file.seek(0)
+    head = report_file.read(SNIFF_SIZE)
+    report_file.seek(0)
+
+    if isinstance(head, str):
+        head = head.encode()
+
+    if head.startswith(ZIP_MAGIC):
+        return "xlsx"
+
+    if head.startswith(OLE2_MAGIC):
+        return "xls"
+
+    # Salesforce "xls" exports are frequently HTML tables in disguise
+    text = head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if text.startswith(b"<") and any(marker in text for marker in HTML_MARKERS):
+        return "html"
+
+    return "csv"
+
+
+def _read_xlsx(report_file: Any) -> Workbook:
+    return openpyxl.load_workbook(report_file)
+
+
+def _read_html(report_file: Any) -> "pd.DataFrame":
+    return pd.read_html(report_file)[0]
+
+
+def _read_xls(report_file: Any) -> "pd.DataFrame":
+    return pd.read_excel(report_file, engine="xlrd")
+
+
+def _read_csv(report_file: Any) -> "pd.DataFrame":
+    return pd.read_csv(report_file)
+
+
+def _stream_xlsx(report_file: Any) -> ReportTable:
+    wb = openpyxl.load_workbook(report_file, read_only=True, data_only=True)
+    return WorksheetTable(wb.active)
+
+
+def _frame_table(reader: Callable[[Any], "pd.DataFrame"]) -> Callable[[Any], ReportTable]:
+    return lambda report_file: DataFrameTable(reader(report_file))
+
+
+READERS: dict[str, Callable[[Any], "Workbook | pd.DataFrame"]] = {
+    "xlsx": _read_xlsx,
+    "html": _read_html,
+    "xls": _read_xls,
+    "csv": _read_csv,
+}
+
+# readers used when only cell values are needed; xlsx and csv are streamed
+TABLE_READERS: dict[str, Callable[[Any], ReportTable]] = {
+    "xlsx": _stream_xlsx,
+    "html": _frame_table(_read_html),
+    "xls": _frame_table(_read_xls),
+    "csv": CsvTable,
+}
+
+
+def _load_report(
+    report_file: Any, file_display_name: str, readers: dict[str, Callable[[Any], Any]]
+) -> Any:
+    with stage("load_report", file=file_display_name) as current:
+        start = time.perf_counter()
+        detected_format = detect_format(report_file)
+        detect_seconds = time.perf_counter() - start
+
+        # try the sniffed reader first, then fall back to the others in case the sniff was wrong
+        formats = [detected_format] + [f for f in readers if f != detected_format]
+        for format_name in formats:
+            parse_start = time.perf_counter()
+            try:
+                report_file.seek(0)
+                report = readers[format_name](report_file)
+
+            except Exception:
+                continue
+
+            stats = {
+                "file": file_display_name,
+                "detected_format": detected_format,
+                "reader": format_name,
+                "detect_seconds": detect_seconds,
+                "parse_seconds": time.perf_counter() - parse_start,
+            }
+            open_history.append(stats)
+            logger.debug("Opened report: %s", stats)
+            current.fields["reader"] = format_name
+            return report
+
+    raise ValueError(f"Unable to open {file_display_name} file; is it in the right format?")
+
+
+def open_report(
+    report_file: Any, file_display_name: str, date_columns: Iterable[str] = ()
+) -> ReportTable:
+    """
+    Opens a report for reading cell values only, without converting it to a workbook
+
+    Any `date_columns` holding strings are converted to datetimes in bulk where the format
+    allows it; rows from xlsx worksheets are streamed as-is. The table should be closed when
+    done, e.g. by using it as a context manager
+    """
+
+    table: ReportTable = _load_report(report_file, file_display_name, TABLE_READERS)
+    table.date_columns = tuple(date_columns)
+    return table
+
+
+@instrumented(rows=lambda wb: wb.active.max_row)
+def open_workbook_read_only(report_file: Any, file_display_name: str) -> Workbook:
+    """
+    Opens an xlsx report as a read-only workbook, whose rows (with their styles and formulas)
+    are streamed from the file rather than loaded up front; it should be closed when done
+    """
+
+    return _load_report(
+        report_file,
+        file_display_name,
+        {"xlsx": lambda f: openpyxl.load_workbook(f, read_only=True)},
     )
+
+
+def open_workbook(report_file: Any, file_display_name: str) -> Workbook:
+    report = _load_report(report_file, file_display_name, READERS)
+    if isinstance(report, Workbook):
+        return report
+
+    # build the workbook in memory rather than round-tripping through an xlsx file
+    wb = Workbook()
+    ws = wb.active
+    for row in DataFrameTable(report).rows():
+        ws.append(row)
+
+    return wb
@@ -1,41 +1,120 @@
 from datetime import date, datetime, time, timedelta
-from typing import cast
+from typing import TYPE_CHECKING, Any, Callable, Optional, TypeVar, cast
 
 import streamlit as st
-from scripts.build_case_report import main as build_case_report
-from scripts.calculate_first_call_resolution import (
-    main as calculate_first_call_resolution,
-)
-from scripts.utils import format_percent
+from scripts import instrumentation
+from scripts.cache import parse_cache
+from scripts.case_store import get_case_store
+from scripts.instrumentation import to_jsonl
+from scripts.jobs import Job, job_pool
+from scripts.lazy_imports import WARMUP, LazyModule, start_warmup
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from scripts import build_case_report, calculate_first_call_resolution, utils
+
+else:
+    # imported on first use, so the first page renders without waiting on them
+    pd = LazyModule("pandas")
+    build_case_report = LazyModule("scripts.build_case_report")
+    calculate_first_call_resolution = LazyModule("scripts.calculate_first_call_resolution")
+    utils = LazyModule("scripts.utils")
+
+case_store = get_case_store()
+
+# the child case thresholds that FCR is charted across, at least up to the chosen one
+THRESHOLD_SWEEP_MAX = 20
+
+# seconds between progress bar updates while a job runs
+PROGRESS_INTERVAL = 0.2
+
+T = TypeVar("T")
+
+
+def run_job(description: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> Job[T]:
+    """
+    Runs `func` on the background job pool, showing its progress until it finishes
+
+    Resubmitting cancels the session's previous job of the same kind, as does the script run
+    being interrupted, so abandoned jobs don't keep a worker busy
+    """
+
+    previous_job = st.session_state.get(f"{description} job")
+    if previous_job is not None:
+        previous_job.cancel()
+
+    job = job_pool.submit(description, func, *args, **kwargs)
+    st.session_state[f"{description} job"] = job
+
+    progress = st.progress(0.0, text=f"Waiting to start {description}...")
+    try:
+        while not job.wait(PROGRESS_INTERVAL):
+            progress.progress(job.fraction, text=job.message)
+
+    except BaseException:
+        job.cancel()
+        raise
+
+    progress.empty()
+    return job
+
+
+def show_diagnostics(records: list[dict]) -> None:
+    if not instrumentation.ENABLED:
+        return
+
+    with st.expander("Diagnostics"):
+        st.caption(
+            "Time and memory per stage of the last run; memory is traced process-wide, so "
+            "overlapped stages also count other jobs' allocations"
+        )
+        st.dataframe(records, hide_index=True)
+        st.download_button(
+            "Download as JSON lines",
+            to_jsonl(records),
+            file_name=f"diagnostics {datetime.now().strftime('%Y-%m-%d %H%M%S')}.jsonl",
+            mime="application/jsonl",
+        )
+
+        st.caption("Parse cache")
+        st.json(parse_cache.stats())
+
+        st.caption("Recent report loads")
+        st.dataframe(list(utils.open_history), hide_index=True)
+
 
 st.title("Reporting Tools")
 
-fcr_tab, case_report_tab = st.tabs(
-    ["First Call Resolution Calculator", "Case Report Formatter"]
-)
+fcr_tab, case_report_tab = st.tabs(["First Call Resolution Calculator", "Case Report Formatter"])
 
 with fcr_tab:
     st.header("First Call Resolution Calculator")
     calculations: dict[str, int] = {}
+    daily_calculations: dict[date, dict[str, int]] = {}
+    fcr_stages: list[dict] = []
 
     with st.form("fcr_calculator"):
-        fcr_reopened_file = st.file_uploader(
-            "1. FCR Re-opened Report", type=["xlsx", "xls"]
-        )
+        fcr_reopened_file = st.file_uploader("1. FCR Re-opened Report", type=["xlsx", "xls"])
         fcr_closed_file = st.file_uploader("2. FCR Closed Report", type=["xlsx", "xls"])
-        fcr_parent_file = st.file_uploader(
-            "3. FCR Parent Cases Report", type=["xlsx", "xls"]
-        )
+        fcr_parent_file = st.file_uploader("3. FCR Parent Cases Report", type=["xlsx", "xls"])
 
         st.markdown("---")
 
-        report_date = st.date_input(
-            "Report Date", value=datetime.today() - timedelta(days=15)
-        )
-        child_case_threshold = int(
-            st.number_input("Child Case Threshold", value=4, min_value=0)
+        default_report_date = (datetime.today() - timedelta(days=15)).date()
+        report_date = st.date_input("Report Date", value=default_report_date)
+
+        use_date_range = st.checkbox("Calculate over a date range instead")
+        report_date_range = st.date_input(
+            "Report Date Range",
+            value=(default_report_date - timedelta(days=6), default_report_date),
         )
+
+        child_case_threshold = int(st.number_input("Child Case Threshold", value=4, min_value=0))
         fcr_submitted = st.form_submit_button("Calculate First Call Resolution")
+        if case_store is not None:
+            st.caption(
+                "Uploads are added to the case store, so results include every upload so far"
+            )
 
         if fcr_submitted:
             if not all([fcr_reopened_file, fcr_closed_file, fcr_parent_file]):
@@ -44,15 +123,45 @@ with fcr_tab:
                     unsafe_allow_html=True,
                 )
 
+            elif use_date_range and len(cast(tuple, report_date_range)) != 2:
+                st.markdown(
+                    '<span style="color:red">**Please select a start and end date**</span>',
+                    unsafe_allow_html=True,
+                )
+
             else:
                 try:
-                    calculations = calculate_first_call_resolution(
-                        report_date,
-                        fcr_reopened_file,
-                        fcr_closed_file,
-                        fcr_parent_file,
-                        child_case_threshold,
-                    )
+                    if use_date_range:
+                        start_date, end_date = cast(tuple, report_date_range)
+                        fcr_job = run_job(
+                            "first call resolution",
+                            calculate_first_call_resolution.main_range,
+                            start_date,
+                            end_date,
+                            fcr_reopened_file,
+                            fcr_closed_file,
+                            fcr_parent_file,
+                            child_case_threshold,
+                            case_store=case_store,
+                        )
+                        fcr_stages = fcr_job.stages
+                        range_calculations = fcr_job.result()
+                        calculations = range_calculations["total"]
+                        daily_calculations = range_calculations["days"]
+
+                    else:
+                        fcr_job = run_job(
+                            "first call resolution",
+                            calculate_first_call_resolution.main,
+                            report_date,
+                            fcr_reopened_file,
+                            fcr_closed_file,
+                            fcr_parent_file,
+                            child_case_threshold,
+                            case_store=case_store,
+                        )
+                        fcr_stages = fcr_job.stages
+                        calculations = fcr_job.result()
 
                 except ValueError as e:
                     st.markdown(
@@ -61,32 +170,65 @@ with fcr_tab:
                     )
 
     if calculations:
-        fcr = (
-            calculations["closed_case_count"]
-            - calculations["escalated_case_count"]
-            - calculations["child_case_count"]
-        ) / calculations["total_cases"]
+        fcr = calculate_first_call_resolution.get_first_call_resolution(calculations)
 
         _, fcr_column, _ = st.columns(3)
-        fcr_column.metric("First Call Resolution", format_percent(fcr))
+        fcr_column.metric("First Call Resolution", utils.format_percent(fcr))
 
         with st.expander("See calculated data"):
-            st.latex(
-                r"""\frac{closed\ cases - escalated\ cases - child\ cases}{total\ cases}"""
-            )
+            st.latex(r"""\frac{closed\ cases - escalated\ cases - child\ cases}{total\ cases}""")
 
             # we tell streamlit that these values are ints to avoid decimal points, despite their types always being ints
             subcol1, subcol2, subcol3, subcol4 = st.columns(4)
             subcol1.metric("Closed Case Count", int(calculations["closed_case_count"]))
-            subcol2.metric(
-                "Escalated Case Count", int(calculations["escalated_case_count"])
-            )
+            subcol2.metric("Escalated Case Count", int(calculations["escalated_case_count"]))
             subcol3.metric("Child Case Count", int(calculations["child_case_count"]))
             subcol4.metric("Total Cases", int(calculations["total_cases"]))
 
+        if daily_calculations:
+            st.subheader("Daily Trend")
+            st.caption("The parent cases report isn't dated, so daily values exclude child cases")
+            st.line_chart(
+                pd.DataFrame(
+                    {
+                        "First Call Resolution": [
+                            calculate_first_call_resolution.get_first_call_resolution(counts) * 100
+                            for counts in daily_calculations.values()
+                        ]
+                    },
+                    index=pd.Index(list(daily_calculations), name="Date"),
+                ),
+                y_label="FCR (%)",
+            )
+
+        # the parent report's subtotals are still in the parse cache, so this doesn't re-read it
+        threshold_sweep = calculate_first_call_resolution.sweep_child_case_threshold(
+            calculations,
+            calculate_first_call_resolution.get_subtotals(fcr_parent_file),
+            range(max(THRESHOLD_SWEEP_MAX, child_case_threshold) + 1),
+        )
+        st.subheader("FCR by Child Case Threshold")
+        st.caption(
+            f"The other counts are unchanged; the current threshold is {child_case_threshold}"
+        )
+        st.line_chart(
+            pd.DataFrame(
+                {"First Call Resolution": [fcr * 100 for fcr in threshold_sweep.values()]},
+                index=pd.Index(list(threshold_sweep), name="Child Case Threshold"),
+            ),
+            y_label="FCR (%)",
+        )
+
+    if fcr_stages:
+        show_diagnostics(fcr_stages)
+
 with case_report_tab:
     st.header("Case Report Formatter")
-    new_report_filepath = ""
+    new_report: Optional[bytes] = None
+    unmapped_statuses: list[dict[str, str]] = []
+    agent_summary: list[dict] = []
+    case_report_warnings: list[str] = []
+    case_report_stages: list[dict] = []
 
     with st.form("case_report"):
         case_report_file = st.file_uploader("Case Report File", type="xlsx")
@@ -95,33 +237,39 @@ with case_report_tab:
         report_datetime = datetime.combine(cast(date, report_date), report_time)
 
         with st.expander("Cycle Performance Thresholds"):
-            st.markdown(
-                """
+            st.markdown("""
                 Values must be in ascending order. Ranges are _non-inclusive_  
                 (e.g. a threshold of 1 means _less than_ 1)
-                """
-            )
+                """)
 
             col1, col2 = st.columns(2)
-            outstanding_color = col2.color_picker("Outstanding Color", value="#92D050", label_visibility="hidden")
+            outstanding_color = col2.color_picker(
+                "Outstanding Color", value="#92D050", label_visibility="hidden"
+            )
             outstanding_val = col1.slider(
                 "Outstanding", value=1.0, min_value=0.0, max_value=5.0, step=0.01
             )
 
             col1, col2 = st.columns(2)
-            exceeds_color = col2.color_picker("Exeeds Color", value="#FFFF00", label_visibility="hidden")
+            exceeds_color = col2.color_picker(
+                "Exeeds Color", value="#FFFF00", label_visibility="hidden"
+            )
             exceeds_val = col1.slider(
                 "Exceeds", value=1.2, min_value=0.0, max_value=5.0, step=0.01
             )
 
             col1, col2 = st.columns(2)
-            competent_color = col2.color_picker("Competent Color", value="#FFC000", label_visibility="hidden")
+            competent_color = col2.color_picker(
+                "Competent Color", value="#FFC000", label_visibility="hidden"
+            )
             competent_val = col1.slider(
                 "Competent", value=2.0, min_value=0.0, max_value=5.0, step=0.01
             )
 
             col1, col2 = st.columns(2)
-            needs_improvement_color = col2.color_picker("Needs Improvement Color", value="#FF0000", label_visibility="hidden")
+            needs_improvement_color = col2.color_picker(
+                "Needs Improvement Color", value="#FF0000", label_visibility="hidden"
+            )
 
             # this isn't actually used since it's the final threshold, it's just here for display purposes
             col1.slider("Needs Improvement (default)", value=5.0, disabled=True)
@@ -137,7 +285,9 @@ with case_report_tab:
 
             else:
                 try:
-                    new_report_filepath = build_case_report(
+                    case_report_job = run_job(
+                        "case report formatting",
+                        build_case_report.main,
                         case_report_file,
                         report_datetime,
                         outstanding_val,
@@ -148,6 +298,12 @@ with case_report_tab:
                         competent_color,
                         needs_improvement_color,
                     )
+                    case_report_stages = case_report_job.stages
+                    case_report = case_report_job.result()
+                    new_report = case_report.workbook
+                    unmapped_statuses = case_report.unmapped_statuses
+                    agent_summary = case_report.agent_summary
+                    case_report_warnings = case_report.warnings
 
                 except ValueError as e:
                     st.markdown(
@@ -155,12 +311,58 @@ with case_report_tab:
                         unsafe_allow_html=True,
                     )
 
-    if new_report_filepath:
+    for warning in case_report_warnings:
+        st.warning(warning)
+
+    if unmapped_statuses:
+        st.warning(
+            "These statuses have no follow-up and weight rule, so they were left blank "
+            "and excluded from the agents' averages"
+        )
+        st.dataframe(unmapped_statuses, hide_index=True)
+
+    if new_report is not None:
         col1, col2, col3 = st.columns(3)
-        with open(new_report_filepath, "rb") as f:
-            col2.download_button(
-                "Download your formatted Case Report",
-                f,
-                file_name=f"Workload Management Report {report_datetime.strftime('%-m-%-d-%Y')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            )
+        col2.download_button(
+            "Download your formatted Case Report",
+            new_report,
+            file_name=f"Workload Management Report {report_datetime.strftime('%-m-%-d-%Y')}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+
+    if agent_summary:
+        st.subheader("Agent Summary")
+        st.caption(
+            "Click a column header to sort; these figures are also in the report's own sheet"
+        )
+        agent_summary_df = pd.DataFrame(agent_summary).rename(
+            columns={
+                "sheet": "Sheet",
+                "agent": "Agent",
+                "statuses": "Statuses",
+                "average_cycles": "Average Cycles",
+            }
+        )
+        st.dataframe(agent_summary_df, hide_index=True)
+
+        summary_file_name = f"Agent Summary {report_datetime.strftime('%-m-%-d-%Y')}"
+        col1, col2 = st.columns(2)
+        col1.download_button(
+            "Download as CSV",
+            agent_summary_df.to_csv(index=False),
+            file_name=f"{summary_file_name}.csv",
+            mime="text/csv",
+        )
+        col2.download_button(
+            "Download as Parquet",
+            agent_summary_df.to_parquet(index=False),
+            file_name=f"{summary_file_name}.parquet",
+            mime="application/vnd.apache.parquet",
+        )
+
+    if case_report_stages:
+        show_diagnostics(case_report_stages)
+
+# after everything else, so the page has rendered before the warmup competes with it
+if WARMUP:
+    start_warmup()
@@ -0,0 +1,13 @@
+"""
+Benchmarks for the reporting tools
+
+Run a benchmark module from the repository root, e.g. `python -m benchmarks.fcr_engines`
+"""
+
+import sys
+from pathlib import Path
+
+# the scripts are imported the same way the Streamlit app imports them
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
@@ -0,0 +1,78 @@
+"""
+Measures case report save time and output size with and without interned styles
+
+The "fresh" run creates a new fill and border for every agent row and cell that asks for
+one, as the formatter did before its styles were interned
+"""
+
+import argparse
+import time
+from io import BytesIO
+from typing import Callable, Hashable, TypeVar
+
+from benchmarks.generators import case_report
+from scripts.build_case_report import (
+    index_pivot_tables,
+    parse_pivot_table_for_cycles_and_weights,
+    write_average_cycle_formulas,
+)
+from scripts.follow_up_rules import load_rule_table
+from scripts.styles import StyleRegistry
+from scripts.utils import open_workbook
+
+T = TypeVar("T")
+
+DEFAULT_AGENTS = [100, 1_000, 5_000]
+
+WEIGHT_PERFORMANCE_MAP: dict[float | str, str] = {
+    1.0: "#92D050",
+    1.2: "#FFFF00",
+    2.0: "#FFC000",
+    "default": "#FF0000",
+}
+
+
+class FreshStyleRegistry(StyleRegistry):
+    """Creates a new style object on every request, rather than interning it"""
+
+    def _intern(self, key: Hashable, factory: Callable[[], T]) -> T:
+        return factory()
+
+
+def format_and_save(report: BytesIO, styles: StyleRegistry) -> tuple[float, float, int]:
+    """Returns the formatting time, save time, and output size"""
+
+    report.seek(0)
+    wb = open_workbook(report, "Case Report")
+
+    rule_table = load_rule_table()
+
+    start = time.perf_counter()
+    for pivot_index in index_pivot_tables(wb.active):
+        agent_data_map = parse_pivot_table_for_cycles_and_weights(pivot_index, rule_table, styles)
+        write_average_cycle_formulas(pivot_index, agent_data_map, WEIGHT_PERFORMANCE_MAP, styles)
+    format_seconds = time.perf_counter() - start
+
+    output = BytesIO()
+    start = time.perf_counter()
+    wb.save(output)
+    save_seconds = time.perf_counter() - start
+
+    return format_seconds, save_seconds, len(output.getvalue())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--agents", type=int, nargs="+", default=DEFAULT_AGENTS)
+    args = parser.parse_args()
+
+    print(f"{'agents':>7} {'styles':>8} {'format (s)':>11} {'save (s)':>9} {'size (bytes)':>13}")
+    for agents in args.agents:
+        report = case_report(agents)
+        for name, styles in [("fresh", FreshStyleRegistry()), ("interned", StyleRegistry())]:
+            format_seconds, save_seconds, size = format_and_save(report, styles)
+            print(f"{agents:>7} {name:>8} {format_seconds:>11.3f} {save_seconds:>9.3f} {size:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Compares formatting case reports in place with streaming them into a write-only workbook
+
+Both paths are run against the same synthetic reports and must produce equivalent workbooks:
+the same sheets, column widths, and cell values and styles
+"""
+
+import argparse
+import time
+import tracemalloc
+from datetime import datetime
+from io import BytesIO
+from typing import Any
+
+import openpyxl
+from openpyxl.cell.cell import Cell
+from openpyxl.workbook import Workbook
+
+from benchmarks.generators import case_report
+from scripts.build_case_report import main as build_case_report
+
+DEFAULT_AGENTS = [500, 2_000, 8_000]
+REPORT_DATETIME = datetime(2024, 1, 15, 13)
+
+THRESHOLDS = {
+    "outstanding_val": 1.0,
+    "outstanding_color": "#92D050",
+    "exceeds_val": 1.2,
+    "exceeds_color": "#FFFF00",
+    "competent_val": 2.0,
+    "competent_color": "#FFC000",
+    "needs_improvement_color": "#FF0000",
+}
+
+
+def format_report(report: BytesIO, write_only: bool) -> tuple[float, float, bytes]:
+    report.seek(0)
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        workbook = build_case_report(
+            report, REPORT_DATETIME, **THRESHOLDS, write_only=write_only
+        ).workbook
+        seconds = time.perf_counter() - start
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+
+    finally:
+        tracemalloc.stop()
+
+    assert workbook is not None
+    return seconds, peak_bytes / 1024**2, workbook
+
+
+def describe_cell(cell: Cell) -> tuple[Any, ...]:
+    return (
+        cell.value,
+        cell.number_format,
+        cell.pivotButton,
+        repr(cell.font),
+        repr(cell.fill),
+        repr(cell.border),
+        repr(cell.alignment),
+    )
+
+
+def compare_workbooks(expected: Workbook, actual: Workbook) -> None:
+    """Raises if the workbooks' sheets, column widths, or cells differ"""
+
+    assert expected.sheetnames == actual.sheetnames, (expected.sheetnames, actual.sheetnames)
+    assert expected.active.title == actual.active.title
+
+    for expected_ws, actual_ws in zip(expected.worksheets, actual.worksheets):
+        for letter, dimension in expected_ws.column_dimensions.items():
+            if dimension.customWidth:
+                actual_width = actual_ws.column_dimensions[letter].width
+                assert actual_width == dimension.width, (letter, dimension.width, actual_width)
+
+        # empty, unstyled cells may or may not be saved, so they're left out of the comparison
+        coordinates = {
+            (cell.row, cell.column)
+            for ws in (expected_ws, actual_ws)
+            for row in ws.iter_rows()
+            for cell in row
+            if cell.value is not None or cell.has_style
+        }
+
+        for row, column in sorted(coordinates):
+            expected_cell = describe_cell(expected_ws.cell(row, column))
+            actual_cell = describe_cell(actual_ws.cell(row, column))
+            if expected_cell != actual_cell:
+                raise AssertionError(
+                    f"{expected_ws.title}!{expected_ws.cell(row, column).coordinate} differs:\n"
+                    f"  in place:   {expected_cell}\n  write-only: {actual_cell}"
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--agents", type=int, nargs="+", default=DEFAULT_AGENTS)
+    parser.add_argument("--teams", type=int, default=1, help="sheets to split the agents across")
+    args = parser.parse_args()
+
+    print(
+        f"{'agents':>8} {'in place (s)':>13} {'write-only (s)':>15} "
+        f"{'in place MB':>12} {'write-only MB':>14}"
+    )
+    for agents in args.agents:
+        report = case_report(agents, teams=args.teams)
+        in_place_seconds, in_place_mb, in_place = format_report(report, write_only=False)
+        write_only_seconds, write_only_mb, write_only = format_report(report, write_only=True)
+
+        compare_workbooks(
+            openpyxl.load_workbook(BytesIO(in_place)), openpyxl.load_workbook(BytesIO(write_only))
+        )
+
+        print(
+            f"{agents:>8} {in_place_seconds:>13.3f} {write_only_seconds:>15.3f} "
+            f"{in_place_mb:>12.1f} {write_only_mb:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Checks the case store's FCR counts against re-parsing the uploads, and times both
+
+Two overlapping cumulative exports are ingested in turn. The second repeats the first's cases,
+some of them escalated since (keeping the same opened time), and adds new ones. Counts from the
+store must match calculating FCR from the second export alone
+"""
+
+import argparse
+import tempfile
+import time
+from datetime import date
+from io import BytesIO
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generators import REPORT_FORMATS, fcr_cases, parent_report, write_report
+from scripts import calculate_first_call_resolution
+from scripts.cache import parse_cache
+from scripts.case_store import CaseStore
+
+DEFAULT_ROWS = 10_000
+START_DATE = date(2024, 1, 1)
+END_DATE = date(2024, 1, 31)
+
+# share of the first export's closed cases that the second export shows as escalated
+ESCALATED_SINCE = 0.1
+
+
+def cumulative_exports(
+    rows: int, file_format: str
+) -> tuple[tuple[BytesIO, BytesIO], tuple[BytesIO, BytesIO]]:
+    """Returns the re-opened and closed reports of a first export and of a later one"""
+
+    reopened = fcr_cases(max(rows // 4, 1), "Edit Date", seed=1)
+    closed = fcr_cases(rows, "Date/Time Opened", seed=2)
+
+    # cases escalated since the first export keep their opened time, so only their row changes
+    later_closed = closed.copy()
+    escalated = np.random.default_rng(3).random(rows) < ESCALATED_SINCE
+    later_closed.loc[escalated, "Was Escalated"] = 1
+    later_closed.loc[escalated, "Status"] = "Escalated"
+
+    new_rows = max(rows // 10, 1)
+    later_reopened = pd.concat(
+        [reopened, fcr_cases(max(new_rows // 4, 1), "Edit Date", seed=4)], ignore_index=True
+    )
+    later_closed = pd.concat(
+        [later_closed, fcr_cases(new_rows, "Date/Time Opened", seed=5)], ignore_index=True
+    )
+
+    return (
+        (write_report(reopened, file_format), write_report(closed, file_format)),
+        (write_report(later_reopened, file_format), write_report(later_closed, file_format)),
+    )
+
+
+def count(case_store: Any, reopened: BytesIO, closed: BytesIO, parent: BytesIO) -> dict:
+    # each run parses its reports from scratch, as a new upload would be
+    parse_cache.clear()
+    for f in (reopened, closed, parent):
+        f.seek(0)
+
+    return calculate_first_call_resolution.main_range(
+        START_DATE, END_DATE, reopened, closed, parent, 4, case_store=case_store
+    )
+
+
+def compare_store(rows: int, file_format: str) -> tuple[float, float]:
+    """Raises if the store's counts differ from re-parsing; returns both runs' seconds"""
+
+    first, later = cumulative_exports(rows, file_format)
+    parent = parent_report(max(rows // 20, 1), file_format)
+
+    start = time.perf_counter()
+    expected = count(None, *later, parent)
+    parse_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        case_store = CaseStore(str(Path(directory) / "cases.db"))
+        count(case_store, *first, parent)
+
+        start = time.perf_counter()
+        actual = count(case_store, *later, parent)
+        store_seconds = time.perf_counter() - start
+
+    if actual != expected:
+        differing = [
+            day for day in expected["days"] if actual["days"].get(day) != expected["days"][day]
+        ]
+        raise AssertionError(
+            f"{file_format}: case store counts differ from re-parsing on {differing}:\n"
+            f"  re-parsed:  {expected['total']}\n  case store: {actual['total']}"
+        )
+
+    return parse_seconds, store_seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[DEFAULT_ROWS])
+    parser.add_argument("--formats", nargs="+", choices=REPORT_FORMATS, default=REPORT_FORMATS)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'format':>7} {'re-parse (s)':>13} {'case store (s)':>15}")
+    for rows in args.rows:
+        for file_format in args.formats:
+            parse_seconds, store_seconds = compare_store(rows, file_format)
+            print(f"{rows:>10} {file_format:>7} {parse_seconds:>13.3f} {store_seconds:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
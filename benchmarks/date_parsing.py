@@ -0,0 +1,65 @@
+"""
+Compares per-row dateutil parsing with the bulk and per-row format-inferring parsers
+
+Every parser must produce the same datetimes as dateutil for each format
+"""
+
+import argparse
+import time
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+from dateutil.parser import parse as parse_date
+
+from scripts.utils import DatetimeParser, parse_datetime_column
+
+SALESFORCE_FORMATS = [
+    "%m/%d/%Y %I:%M %p",
+    "%m/%d/%Y, %I:%M %p",
+    "%m/%d/%Y %H:%M",
+    "%m/%d/%Y",
+    "%Y-%m-%dT%H:%M:%S.000+0000",
+]
+
+
+def timestamps(rows: int, datetime_format: str) -> pd.Series:
+    rng = np.random.default_rng(0)
+    minutes = rng.integers(0, 365 * 24 * 60, rows)
+    values = pd.Timestamp("2024-01-01") + pd.to_timedelta(minutes, unit="min")
+    return pd.Series(values.strftime(datetime_format), dtype=object)
+
+
+def timed(parse: Callable[[pd.Series], Any], values: pd.Series) -> tuple[float, list]:
+    start = time.perf_counter()
+    parsed = list(parse(values))
+    return time.perf_counter() - start, parsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(
+        f"{'format':<30} {'dateutil (s)':>13} {'bulk (s)':>9} {'per-row (s)':>12} "
+        f"{'bulk speedup':>13}"
+    )
+    for datetime_format in SALESFORCE_FORMATS:
+        values = timestamps(args.rows, datetime_format)
+
+        dateutil_seconds, expected = timed(lambda v: v.map(parse_date), values)
+        bulk_seconds, bulk = timed(parse_datetime_column, values)
+        row_seconds, per_row = timed(lambda v: v.map(DatetimeParser()), values)
+
+        if bulk != expected or per_row != expected:
+            raise AssertionError(f"Parsed values differ from dateutil for {datetime_format}")
+
+        print(
+            f"{datetime_format:<30} {dateutil_seconds:>13.3f} {bulk_seconds:>9.3f} "
+            f"{row_seconds:>12.3f} {dateutil_seconds / bulk_seconds:>12.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
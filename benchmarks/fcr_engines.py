@@ -0,0 +1,68 @@
+"""
+Compares the row-by-row and vectorized FCR engines
+
+Both engines are run against the same synthetic reports and must return identical results
+"""
+
+import argparse
+import time
+from datetime import date
+from typing import Any, Callable
+
+from benchmarks.generators import REPORT_FORMATS, fcr_reports
+from scripts import calculate_first_call_resolution, calculate_first_call_resolution_vectorized
+from scripts.cache import parse_cache
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+REPORT_DATE = date(2024, 1, 15)
+
+
+def time_engine(
+    engine: Callable[..., dict[str, int]], files: tuple, repeat: int
+) -> tuple[float, Any]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        # every run parses the reports, rather than the later ones reading the parse cache
+        parse_cache.clear()
+        for f in files:
+            f.seek(0)
+
+        start = time.perf_counter()
+        result = engine(REPORT_DATE, *files, None, 0, child_case_count_override=0)
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--format", choices=REPORT_FORMATS, default="csv")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'row-by-row (s)':>15} {'vectorized (s)':>15} {'speedup':>8}")
+    for size in args.sizes:
+        files = fcr_reports(size, args.format)
+
+        loop_seconds, loop_result = time_engine(
+            calculate_first_call_resolution.main, files, args.repeat
+        )
+        vectorized_seconds, vectorized_result = time_engine(
+            calculate_first_call_resolution_vectorized.main, files, args.repeat
+        )
+
+        if loop_result != vectorized_result:
+            raise AssertionError(
+                f"Engines disagree at {size} rows: {loop_result} != {vectorized_result}"
+            )
+
+        print(
+            f"{size:>10} {loop_seconds:>15.3f} {vectorized_seconds:>15.3f} "
+            f"{loop_seconds / vectorized_seconds:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Checks both FCR engines against counts worked out directly from small synthetic reports
+
+Every report format is covered, with Salesforce's usual timestamps and with ISO timestamps
+carrying a UTC offset. It takes around ten seconds, so it's quick to run after changing
+either engine
+"""
+
+import argparse
+from datetime import date, datetime
+from io import BytesIO
+from typing import Any, Callable, Optional
+
+import pandas as pd
+
+from benchmarks.generators import (
+    ISO_DATETIME_FORMAT,
+    REPORT_FORMATS,
+    SALESFORCE_DATETIME_FORMAT,
+    fcr_cases,
+    parent_report,
+    write_report,
+)
+from scripts import calculate_first_call_resolution, calculate_first_call_resolution_vectorized
+from scripts.cache import parse_cache
+
+DEFAULT_ROWS = 1_000
+DATETIME_FORMATS = [SALESFORCE_DATETIME_FORMAT, ISO_DATETIME_FORMAT]
+
+START_DATE = date(2024, 1, 1)
+END_DATE = date(2024, 1, 30)
+
+# checked one at a time: the first and last days, some in between, and one without cases
+REPORT_DATES = [START_DATE, date(2024, 1, 2), date(2024, 1, 15), END_DATE, date(2024, 3, 1)]
+
+ENGINES: dict[str, Callable[..., dict[str, int]]] = {
+    "row-by-row": calculate_first_call_resolution.main,
+    "vectorized": calculate_first_call_resolution_vectorized.main,
+}
+
+
+Case = tuple[datetime, dict[str, Any], bool]  # (datetime, report row, is re-opened)
+
+
+def generated_cases(
+    reports: list[tuple[pd.DataFrame, str, bool]], datetime_format: str
+) -> list[Case]:
+    """Returns the generated reports' rows in report order, re-opened report first"""
+
+    return [
+        (datetime.strptime(row[report_date_column], datetime_format), row, is_reopened)
+        for df, report_date_column, is_reopened in reports
+        for row in df.to_dict("records")
+    ]
+
+
+def expected_counts(cases: list[Case], report_date: date) -> Optional[dict[str, int]]:
+    """
+    Counts the report date's cases straight from the generated data, keeping each case's
+    newest row (the first one on a tie), or returns None if there are none
+    """
+
+    cases = [case for case in cases if case[0].date() == report_date]
+    if not cases:
+        return None
+
+    newest: dict[str, Case] = {}
+    for case in cases:
+        case_number = case[1]["Case Number"]
+        if case_number not in newest or case[0] > newest[case_number][0]:
+            newest[case_number] = case
+
+    closed = [row for _, row, is_reopened in newest.values() if not is_reopened]
+    return {
+        "closed_case_count": len(closed),
+        "escalated_case_count": sum(bool(row["Was Escalated"]) for row in closed),
+        "child_case_count": 0,
+        "total_cases": len(newest),
+    }
+
+
+def run(engine: Callable[..., Any], files: list[BytesIO], *args: Any) -> Any:
+    # each run parses its reports from scratch, rather than reading another's parse cache
+    parse_cache.clear()
+    for f in files:
+        f.seek(0)
+
+    try:
+        return engine(*args, child_case_count_override=0)
+
+    except ValueError as e:
+        if "No cases found" in str(e):
+            return None
+
+        raise
+
+
+def check(rows: int, file_format: str, datetime_format: str) -> int:
+    """Raises if either engine's counts differ from the expected ones; returns the checks run"""
+
+    reopened = fcr_cases(max(rows // 4, 1), "Edit Date", seed=1, datetime_format=datetime_format)
+    closed = fcr_cases(rows, "Date/Time Opened", seed=2, datetime_format=datetime_format)
+    cases = generated_cases(
+        [(reopened, "Edit Date", True), (closed, "Date/Time Opened", False)], datetime_format
+    )
+    files = [
+        write_report(reopened, file_format),
+        write_report(closed, file_format),
+        parent_report(10, file_format),
+    ]
+
+    label = f"{file_format}, {datetime_format}"
+    checks = 0
+    for report_date in REPORT_DATES:
+        expected = expected_counts(cases, report_date)
+        for name, engine in ENGINES.items():
+            actual = run(engine, files, report_date, *files, 4)
+            assert actual == expected, f"{name} on {report_date} ({label}): {actual} != {expected}"
+            checks += 1
+
+    days = run(calculate_first_call_resolution.main_range, files, START_DATE, END_DATE, *files, 4)
+    for day, counts in days["days"].items():
+        expected = expected_counts(cases, day)
+        assert counts == expected, f"main_range on {day} ({label}): {counts} != {expected}"
+        checks += 1
+
+    return checks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="rows per closed report")
+    parser.add_argument("--formats", nargs="+", choices=REPORT_FORMATS, default=REPORT_FORMATS)
+    args = parser.parse_args()
+
+    for file_format in args.formats:
+        for datetime_format in DATETIME_FORMATS:
+            checks = check(args.rows, file_format, datetime_format)
+            print(f"{file_format:>5} {datetime_format:<26} {checks:>4} checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Synthetic report generators for benchmarks"""
+
+from datetime import date, datetime, time
+from io import BytesIO
+from typing import Any
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from openpyxl.styles import Alignment
+
+SALESFORCE_DATETIME_FORMAT = "%m/%d/%Y %I:%M %p"
+
+# the ISO 8601 timestamps, with a UTC offset, that Salesforce's API and some exports use
+ISO_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.000%z"
+
+# "xls" reports are generated the way Salesforce exports them: as HTML tables in disguise
+REPORT_FORMATS = ["xlsx", "xls", "csv", "html"]
+
+CASE_STATUSES = [
+    "1st Attempt",
+    "2nd Attempt",
+    "Escalated",
+    "New",
+    "Open",
+    "Re-opened",
+    "RMA in Progress",
+    "Waiting on Customer",
+    "Waiting on Development",
+    "Working",
+]
+
+
+def fcr_cases(
+    rows: int,
+    report_date_column: str,
+    start_date: date = date(2024, 1, 1),
+    days: int = 30,
+    seed: int = 0,
+    datetime_format: str = SALESFORCE_DATETIME_FORMAT,
+) -> pd.DataFrame:
+    """
+    Generates a re-opened or closed FCR report with `rows` cases spread over `days` days
+
+    Case numbers are drawn from a pool half the size of the report, so many cases appear more
+    than once, and timestamps are minute-resolution strings so that ties are common. Formats
+    with a UTC offset (%z) get UTC timestamps
+    """
+
+    rng = np.random.default_rng(seed)
+    start = datetime.combine(start_date, time())
+
+    minutes = rng.integers(0, days * 24 * 60, rows)
+    timestamps = pd.Timestamp(start) + pd.to_timedelta(minutes, unit="min")
+    if "%z" in datetime_format:
+        timestamps = timestamps.tz_localize("UTC")
+    case_numbers = rng.integers(0, max(rows // 2, 1), rows)
+
+    return pd.DataFrame(
+        {
+            "Case Owner": rng.choice(["Alice", "Bob", "Carol", "Dave"], rows),
+            "Case Number": pd.Series(case_numbers).astype(str).str.zfill(8),
+            report_date_column: timestamps.strftime(datetime_format),
+            "Status": rng.choice(["Closed", "Re-opened", "Working"], rows),
+            "Open": rng.integers(0, 2, rows),
+            "Closed": rng.integers(0, 2, rows),
+            "Was Escalated": (rng.random(rows) < 0.2).astype(int),
+        }
+    )
+
+
+def write_report(df: pd.DataFrame, file_format: str) -> BytesIO:
+    """Serializes a report the way Salesforce exports it in the given format"""
+
+    f = BytesIO()
+    if file_format == "xlsx":
+        df.to_excel(f, index=False, engine="openpyxl")
+
+    elif file_format == "csv":
+        f.write(df.to_csv(index=False).encode())
+
+    elif file_format in ("html", "xls"):
+        f.write(df.to_html(index=False).encode())
+
+    else:
+        raise ValueError(f"Unsupported report format: {file_format}")
+
+    f.seek(0)
+    return f
+
+
+def fcr_reports(rows: int, file_format: str, **kwargs: Any) -> tuple[BytesIO, BytesIO]:
+    """Generates a re-opened report and a closed report, the re-opened one a quarter the size"""
+
+    reopened = fcr_cases(max(rows // 4, 1), "Edit Date", seed=1, **kwargs)
+    closed = fcr_cases(rows, "Date/Time Opened", seed=2, **kwargs)
+
+    return write_report(reopened, file_format), write_report(closed, file_format)
+
+
+def parent_report(parents: int, file_format: str, seed: int = 0) -> BytesIO:
+    """
+    Generates a parent cases report grouped by parent case, each group ending in a "Subtotal"
+    row with its child case count
+
+    Workbooks get a blank first column, like the Salesforce export; the other formats are laid
+    out like a converted DataFrame, whose index column takes its place
+    """
+
+    rng = np.random.default_rng(seed)
+    rows: list[list[Any]] = []
+    for parent in range(parents):
+        child_cases = int(rng.integers(1, 10))
+        rows.extend([f"P{parent:07d}", f"{parent * 10 + i:08d}", None] for i in range(child_cases))
+        rows.append(["Subtotal", None, child_cases])
+
+    if file_format != "xlsx":
+        return write_report(
+            pd.DataFrame(rows, columns=["Parent Case", "Case Number", "Record Count"]),
+            file_format,
+        )
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append([None, "Parent Case", "Case Number", "Record Count"])
+    for row in rows:
+        ws.append([None, *row])
+
+    f = BytesIO()
+    wb.save(f)
+    f.seek(0)
+    return f
+
+
+def case_report(agents: int, seed: int = 0, teams: int = 1) -> BytesIO:
+    """
+    Generates a workload management report with a pivot table of `agents` agents, each
+    followed by a handful of indented status rows
+
+    With several `teams`, the agents are split between them, one sheet and pivot table each
+    """
+
+    rng = np.random.default_rng(seed)
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+
+    status_alignment = Alignment(indent=1)
+    for team in range(teams):
+        ws = wb.create_sheet("Sheet" if teams == 1 else f"Team {team + 1}")
+        ws.append(["Workload Management Report as of "])
+        ws.append([])
+        ws.append(["Case Owner", "(All)"])
+        ws.append([])
+        ws.append(
+            ["Row Labels", "Average of Age", "Count of Cases", "Cycles", "Weight", "Avg Cycles"]
+        )
+        ws.cell(ws.max_row, 1).pivotButton = True
+
+        team_agents = range(team, agents, teams)
+        for agent in team_agents:
+            ws.append([f"Agent {agent}", float(rng.random() * 10), int(rng.integers(1, 40))])
+
+            statuses = rng.choice(CASE_STATUSES, int(rng.integers(1, 6)), replace=False)
+            for status in statuses:
+                ws.append([str(status), float(rng.random() * 20), int(rng.integers(1, 10))])
+                ws.cell(ws.max_row, 1).alignment = status_alignment
+
+        ws.append(["Grand Total", 5.0, len(team_agents) * 20])
+        ws.column_dimensions["A"].width = 32
+        ws.column_dimensions["B"].width = 16
+
+    # the pivot table's source data usually sits on a sheet of its own
+    data = wb.create_sheet("Data")
+    data.append(["Case Owner", "Status", "Age"])
+    for agent in range(min(agents, 100)):
+        data.append([f"Agent {agent}", str(rng.choice(CASE_STATUSES)), float(rng.random() * 20)])
+
+    wb.active = 0
+
+    f = BytesIO()
+    wb.save(f)
+    f.seek(0)
+    return f
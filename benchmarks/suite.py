@@ -0,0 +1,269 @@
+"""
+Times the main entry points against synthetic reports, tracking throughput and peak memory
+
+Save a run and compare later runs against it to catch regressions, e.g.
+    python -m benchmarks.suite --save baseline.json
+    python -m benchmarks.suite --compare baseline.json
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime
+from io import BytesIO
+from typing import Any, Callable, NamedTuple
+
+import openpyxl
+
+from benchmarks import APP_DIR
+from benchmarks.generators import REPORT_FORMATS, case_report, fcr_reports, parent_report
+from scripts import calculate_first_call_resolution
+from scripts.build_case_report import main as build_case_report
+from scripts.cache import parse_cache
+from scripts.utils import open_workbook
+
+# timed from a cold start in a fresh interpreter, as a new app process would import them
+STARTUP_MODULES = [
+    "streamlit_app",
+    "scripts.calculate_first_call_resolution",
+    "scripts.build_case_report",
+]
+
+STARTUP_SCRIPT = """
+import json, sys, time, tracemalloc
+if sys.argv[2] == "memory":
+    tracemalloc.start()
+
+start = time.perf_counter()
+__import__(sys.argv[1])
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "peak_bytes": tracemalloc.get_traced_memory()[1]}))
+"""
+
+REPORT_DATE = date(2024, 1, 15)
+REPORT_DATETIME = datetime(2024, 1, 15, 13)
+
+CASE_REPORT_THRESHOLDS = {
+    "outstanding_val": 1.0,
+    "outstanding_color": "#92D050",
+    "exceeds_val": 1.2,
+    "exceeds_color": "#FFFF00",
+    "competent_val": 2.0,
+    "competent_color": "#FFC000",
+    "needs_improvement_color": "#FF0000",
+}
+
+
+class Benchmark(NamedTuple):
+    name: str
+    rows: int  # input rows processed per run, for throughput
+    files: list[BytesIO]
+    run: Callable[[], Any]
+
+
+def count_rows(f: BytesIO) -> int:
+    wb = openpyxl.load_workbook(f, read_only=True)
+    rows = wb.active.max_row
+    wb.close()
+    f.seek(0)
+    return rows
+
+
+def build_benchmarks(rows: int, agents: int, formats: list[str]) -> list[Benchmark]:
+    benchmarks = []
+    parents = max(rows // 20, 1)
+    for file_format in formats:
+        reopened, closed = fcr_reports(rows, file_format)
+        parent = parent_report(parents, file_format)
+
+        benchmarks.append(
+            Benchmark(
+                f"open_workbook[{file_format}]",
+                rows,
+                [closed],
+                lambda closed=closed: open_workbook(closed, "Closed Report"),
+            )
+        )
+        benchmarks.append(
+            Benchmark(
+                f"fcr.main[{file_format}]",
+                max(rows // 4, 1) + rows,  # the case rows; the parent report is much smaller
+                [reopened, closed, parent],
+                lambda files=(reopened, closed, parent): calculate_first_call_resolution.main(
+                    REPORT_DATE, *files, child_case_threshold=4
+                ),
+            )
+        )
+
+    report = case_report(agents)
+    benchmarks.append(
+        Benchmark(
+            "build_case_report.main",
+            count_rows(report),
+            [report],
+            lambda: build_case_report(report, REPORT_DATETIME, **CASE_REPORT_THRESHOLDS),
+        )
+    )
+
+    return benchmarks
+
+
+def run_once(benchmark: Benchmark) -> None:
+    # each run should parse its reports from scratch, as a new upload would be
+    parse_cache.clear()
+    for f in benchmark.files:
+        f.seek(0)
+
+    benchmark.run()
+
+
+def measure(benchmark: Benchmark, repeat: int) -> dict[str, Any]:
+    seconds = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run_once(benchmark)
+        seconds = min(seconds, time.perf_counter() - start)
+
+    # memory is measured on a separate run, since tracing slows everything down
+    tracemalloc.start()
+    try:
+        run_once(benchmark)
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "rows": benchmark.rows,
+        "seconds": round(seconds, 4),
+        "rows_per_second": round(benchmark.rows / seconds),
+        "peak_mb": round(peak_bytes / 1024**2, 2),
+    }
+
+
+def run_startup(module: str, mode: str) -> dict[str, Any]:
+    result = subprocess.run(
+        [sys.executable, "-c", STARTUP_SCRIPT, module, mode],
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # the app may print warnings about running outside of `streamlit run` before the result
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure_startup(module: str, repeat: int) -> dict[str, Any]:
+    """Times importing `module` in a fresh interpreter, and its peak memory on a separate run"""
+
+    seconds = min(run_startup(module, "time")["seconds"] for _ in range(repeat))
+    peak_bytes = run_startup(module, "memory")["peak_bytes"]
+
+    return {
+        "rows": 0,
+        "seconds": round(seconds, 4),
+        "rows_per_second": None,
+        "peak_mb": round(peak_bytes / 1024**2, 2),
+    }
+
+
+def compare(
+    results: dict[str, dict[str, Any]], baseline: dict[str, dict[str, Any]], tolerance: float
+) -> list[str]:
+    """Describes every benchmark that got slower or hungrier than `tolerance` allows"""
+
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        for metric in ("seconds", "peak_mb"):
+            before, after = baseline[name][metric], result[metric]
+            if before and after > before * (1 + tolerance):
+                regressions.append(f"{name}: {metric} went from {before} to {after}")
+
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=10_000, help="rows per closed FCR report")
+    parser.add_argument("--agents", type=int, default=500, help="agents in the case report")
+    parser.add_argument("--formats", nargs="+", choices=REPORT_FORMATS, default=REPORT_FORMATS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--skip-startup", action="store_true", help="don't time importing the app and scripts"
+    )
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare against results saved with --save")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed increase in time or memory, e.g. 0.2 for 20%%",
+    )
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'benchmark':<48} {'rows':>8} {'seconds':>9} {'rows/s':>10} {'peak MB':>9}")
+
+    def print_result(name: str, result: dict[str, Any]) -> None:
+        print(
+            f"{name:<48} {result['rows']:>8} {result['seconds']:>9.3f} "
+            f"{result['rows_per_second'] or '-':>10} {result['peak_mb']:>9.2f}"
+        )
+
+    if not args.skip_startup:
+        for module in STARTUP_MODULES:
+            name = f"startup[{module}]"
+            try:
+                results[name] = measure_startup(module, args.repeat)
+
+            except subprocess.CalledProcessError as e:
+                # e.g. Streamlit isn't installed where the benchmarks are run
+                print(f"{name}: skipped, {e.stderr.strip().splitlines()[-1]}", file=sys.stderr)
+                continue
+
+            print_result(name, results[name])
+
+    for benchmark in build_benchmarks(args.rows, args.agents, args.formats):
+        results[benchmark.name] = measure(benchmark, args.repeat)
+        print_result(benchmark.name, results[benchmark.name])
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "args": vars(args),
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+
+        if regressions:
+            return 1
+
+        print(f"No regressions against {args.compare}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())